@@ -0,0 +1,212 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import botocore
+
+from . import history
+from .models import Account, OrganizationalUnit, EnabledControl, ControlOperation
+from .utilities import (
+    MAX_CONCURRENCY,
+    MAX_MUTATION_CONCURRENCY,
+    get_control_tower_client,
+    get_organizations_client,
+)
+
+# asyncio execution core for AWS calls.
+# boto3 calls run on a bounded executor over the shared (thread-safe) clients, while waiting,
+# polling and fan-out happen on the event loop. The interactive CLI stays synchronous and uses `run`.
+
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="ctower-aio")
+
+DEFAULT_POLL_INTERVAL = 5
+# replayed polls answer instantly, so replays skip the poll interval unless the recorded latency is simulated
+_poll_sleep_enabled = [True]
+
+
+class ControlOperationTimeout(Exception):
+    pass
+
+
+class ControlOperationsNotSupported(Exception):
+    pass
+
+
+def disable_poll_sleep():
+    _poll_sleep_enabled[0] = False
+
+
+def run(coroutine):
+    """Runs a coroutine from synchronous code."""
+    return asyncio.run(coroutine)
+
+
+async def _call(function, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(function, *args, **kwargs))
+
+
+def _paginate(client, operation_name, result_key, **kwargs):
+    items = []
+    for page in client.get_paginator(operation_name).paginate(**kwargs):
+        items.extend(page.get(result_key, []))
+    return items
+
+
+async def gather_with_concurrency(coroutines, limit=MAX_CONCURRENCY):
+    """Awaits the coroutines with at most `limit` running at once.
+
+    Results are returned in order; a failed coroutine returns its exception instead of raising.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(_bounded(c) for c in coroutines), return_exceptions=True)
+
+
+async def list_root_ids(client=None):
+    client = client or get_organizations_client()
+    roots = await _call(_paginate, client, "list_roots", "Roots")
+    return [root.get("Id") for root in roots]
+
+
+async def list_organizational_units(client=None):
+    """Lists the Organizational Units under every root of the Organization."""
+    client = client or get_organizations_client()
+    root_ids = await list_root_ids(client)
+
+    async def _list_for_parent(root_id):
+        ous = await _call(
+            _paginate, client, "list_organizational_units_for_parent", "OrganizationalUnits", ParentId=root_id
+        )
+        return [OrganizationalUnit.from_dict(ou, parent_id=root_id) for ou in ous]
+
+    results = await asyncio.gather(*(_list_for_parent(root_id) for root_id in root_ids))
+    return [ou for ous in results for ou in ous]
+
+
+async def list_accounts_for_organizational_unit(organizational_unit, client=None):
+    """Lists the accounts directly under an Organizational Unit."""
+    client = client or get_organizations_client()
+    accounts = await _call(_paginate, client, "list_accounts_for_parent", "Accounts", ParentId=organizational_unit.id)
+    return [Account.from_dict(account, parent_id=organizational_unit.id) for account in accounts]
+
+
+async def fetch_credentials(credential_fetcher):
+    """Fetches credentials with a botocore credential fetcher, e.g. an `AssumeRoleCredentialFetcher`."""
+    return await _call(credential_fetcher.fetch_credentials)
+
+
+async def list_compliance_by_config_rule(config_client):
+    """Lists the compliance of every AWS Config rule, with a Config client of the account to check."""
+    return await _call(_paginate, config_client, "describe_compliance_by_config_rule", "ComplianceByConfigRules")
+
+
+async def list_enabled_controls(organizational_unit_arn, client=None):
+    client = client or get_control_tower_client()
+    enabled_controls = await _call(
+        _paginate, client, "list_enabled_controls", "enabledControls", targetIdentifier=organizational_unit_arn
+    )
+    return [EnabledControl.from_arn(ec.get("controlIdentifier")) for ec in enabled_controls]
+
+
+async def list_enabled_controls_for_organizational_units(organizational_units, client=None, limit=MAX_CONCURRENCY):
+    """Returns {ou_arn: [EnabledControl] or exception} for the given Organizational Units."""
+    results = await gather_with_concurrency(
+        [list_enabled_controls(ou.arn, client=client) for ou in organizational_units], limit=limit
+    )
+    return {ou.arn: result for ou, result in zip(organizational_units, results)}
+
+
+def record_submitted_operation(operation_id, control_arn, target_arn, operation_type, client=None):
+    client = client or get_control_tower_client()
+    history.record_submitted(
+        operation_id,
+        EnabledControl.from_arn(control_arn).control_id,
+        target_arn,
+        operation_type,
+        region=client.meta.region_name,
+    )
+
+
+async def enable_control(control_arn, target_arn, client=None):
+    """Starts enabling a control, returns the operation identifier."""
+    client = client or get_control_tower_client()
+    response = await _call(client.enable_control, controlIdentifier=control_arn, targetIdentifier=target_arn)
+    operation_id = response.get("operationIdentifier")
+    record_submitted_operation(operation_id, control_arn, target_arn, "ENABLE_CONTROL", client=client)
+    return operation_id
+
+
+async def disable_control(control_arn, target_arn, client=None):
+    """Starts disabling a control, returns the operation identifier."""
+    client = client or get_control_tower_client()
+    response = await _call(client.disable_control, controlIdentifier=control_arn, targetIdentifier=target_arn)
+    operation_id = response.get("operationIdentifier")
+    record_submitted_operation(operation_id, control_arn, target_arn, "DISABLE_CONTROL", client=client)
+    return operation_id
+
+
+async def get_control_operation(operation_identifier, client=None):
+    client = client or get_control_tower_client()
+    response = await _call(client.get_control_operation, operationIdentifier=operation_identifier)
+    return ControlOperation.from_dict(response.get("controlOperation", {}), operation_id=operation_identifier)
+
+
+def supports_list_control_operations(client=None):
+    """Older botocore releases (e.g. the locked 1.27.x) do not have the ListControlOperations API."""
+    client = client or get_control_tower_client()
+    return "ListControlOperations" in client.meta.service_model.operation_names
+
+
+async def list_control_operations(target_arns=None, statuses=None, client=None):
+    """Lists control operations filtered by target and status.
+
+    Raises ControlOperationsNotSupported when the installed botocore predates the ListControlOperations API.
+    """
+    client = client or get_control_tower_client()
+    if not supports_list_control_operations(client):
+        raise ControlOperationsNotSupported(
+            f"botocore {botocore.__version__} does not support ListControlOperations, upgrade boto3 to list control operations"
+        )
+    operation_filter = {}
+    if target_arns:
+        operation_filter["targetIdentifiers"] = list(target_arns)
+    if statuses:
+        operation_filter["statuses"] = list(statuses)
+    operations = await _call(
+        _paginate, client, "list_control_operations", "controlOperations", filter=operation_filter
+    )
+    return [ControlOperation.from_dict(operation) for operation in operations]
+
+
+async def reconcile_in_progress_operations(client=None):
+    """Looks up the operations still in progress in the local history, records the finished ones and returns their count."""
+    client = client or get_control_tower_client()
+    operation_ids = history.in_progress_operation_ids(region=client.meta.region_name)
+    results = await gather_with_concurrency([get_control_operation(operation_id, client=client) for operation_id in operation_ids])
+    finished_operations = [result for result in results if not isinstance(result, Exception) and result.is_finished]
+    for operation in finished_operations:
+        history.record_finished(operation)
+    return len(finished_operations)
+
+
+async def wait_for_control_operation(
+    operation_identifier, client=None, poll_interval=DEFAULT_POLL_INTERVAL, timeout=None
+):
+    """Polls a control operation until it succeeds or fails, returns the final ControlOperation."""
+    started = time.monotonic()
+    while True:
+        operation = await get_control_operation(operation_identifier, client=client)
+        if operation.is_finished:
+            history.record_finished(operation)
+            return operation
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise ControlOperationTimeout(
+                f"Control operation {operation_identifier} is still {operation.status} after {timeout} seconds"
+            )
+        await asyncio.sleep(poll_interval if _poll_sleep_enabled[0] else 0)
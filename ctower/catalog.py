@@ -0,0 +1,117 @@
+import json
+import os
+from functools import lru_cache
+
+import botocore.session
+
+from .models import Control
+
+# GuardRail Control catalog, loaded once from the packaged data file.
+# https://docs.aws.amazon.com/controltower/latest/userguide/control-identifiers.html
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "controls.json")
+GUARDRAIL_ARN_FMT = "arn:aws:controltower:{region}::control/{control_identifier}"
+
+CATEGORIES = ("elective", "data-residency", "strongly-recommended", "mandatory")
+BEHAVIORS = ("preventive", "detective")
+FILTER_KEYS = ("category", "behavior", "region", "text")
+
+
+@lru_cache(maxsize=None)
+def load_catalog(path=CATALOG_PATH):
+    """Returns every catalog Control in catalog order."""
+    with open(path, "r") as file:
+        data = json.load(file)
+    return tuple(Control.from_dict(control_dict) for control_dict in data.get("controls", []))
+
+
+@lru_cache(maxsize=None)
+def get_controls_by_id():
+    controls = {}
+    for control in load_catalog():
+        controls.setdefault(control.id, control)
+    return controls
+
+
+def find_control(control_id):
+    return get_controls_by_id().get(control_id, False)
+
+
+@lru_cache(maxsize=None)
+def get_guardrail_arns(region):
+    """Control ARNs of the whole catalog for a region, formatted once per region."""
+    return {
+        control.id: GUARDRAIL_ARN_FMT.format(region=region, control_identifier=control.id)
+        for control in load_catalog()
+    }
+
+
+def generate_guardrail_arn(control_identifier, region):
+    arn = get_guardrail_arns(region).get(control_identifier)
+    if arn is None:
+        arn = GUARDRAIL_ARN_FMT.format(region=region, control_identifier=control_identifier)
+    return arn
+
+
+@lru_cache(maxsize=None)
+def get_control_tower_regions():
+    """Regions Control Tower is offered in, from botocore's bundled endpoint data (no API call)."""
+    return frozenset(botocore.session.get_session().get_available_regions("controltower"))
+
+
+def is_available_in_region(control, region):
+    regions = control.regions if control.regions is not None else get_control_tower_regions()
+    return region in regions
+
+
+def unavailable_control_ids(control_ids, region):
+    """Catalog control ids that are not available in the region, unknown ids are left to the caller."""
+    controls_by_id = get_controls_by_id()
+    return [
+        control_id
+        for control_id in control_ids
+        if control_id in controls_by_id and not is_available_in_region(controls_by_id[control_id], region)
+    ]
+
+
+def query(category=None, behavior=None, region=None, text=None):
+    """Returns the catalog Controls matching every given filter. `text` matches the id or description."""
+    controls = []
+    for control in load_catalog():
+        if category and control.category != category:
+            continue
+        if behavior and control.behavior != behavior:
+            continue
+        if region and not is_available_in_region(control, region):
+            continue
+        if text and text.lower() not in f"{control.id} {control.text}".lower():
+            continue
+        controls.append(control)
+    return controls
+
+
+def _allowed_filter_values(key):
+    if key == "category":
+        return CATEGORIES
+    if key == "behavior":
+        return BEHAVIORS
+    if key == "region":
+        return sorted(get_control_tower_regions())
+    return None
+
+
+def parse_filters(filters):
+    """Parses `key=value` filter expressions into `query` keyword arguments, raises ValueError if invalid."""
+    parsed = {}
+    for expression in filters or []:
+        key, separator, value = expression.partition("=")
+        key, value = key.strip().lower(), value.strip()
+        if not separator or key not in FILTER_KEYS or not value:
+            raise ValueError(f"Invalid filter `{expression}`, use one of: {', '.join(f'{k}=<value>' for k in FILTER_KEYS)}")
+        allowed_values = _allowed_filter_values(key)
+        if allowed_values is not None:
+            value = value.lower()
+            if value not in allowed_values:
+                raise ValueError(f"Invalid {key} `{value}` in filter `{expression}`, use one of: {', '.join(allowed_values)}")
+        parsed[key] = value
+    return parsed
@@ -1,5 +1,5 @@
 import boto3
-from typing import Optional
+from typing import List, Optional
 import typer
 from rich.table import Table
 from rich.panel import Panel
@@ -7,17 +7,25 @@ from functools import lru_cache
 from rich.prompt import Confirm
 from rich.console import Group
 
+from . import catalog
 from . import guardrail_identifiers
+from . import aio
+from . import preflight
+from . import rollout
+from . import history
+from . import live
+from .progress import ControlOperationsProgress
 from .utilities import (
     get_boto_session,
     find_guardrail_control_by_id,
     get_organizational_units,
+    get_guardrail_controls_by_category,
     get_rich_console,
     print_error_panel,
     print_success_panel,
+    print_warning_panel,
     get_control_tower_client,
     find_organizational_unit_by_id_or_name,
-    _list_enabled_controls,
 )
 
 
@@ -32,6 +40,7 @@ remove_app = typer.Typer(no_args_is_help=True, help=f"Disables a GuardRail Contr
 ls_app = typer.Typer(no_args_is_help=True, help="Lists Organizational Units, GuardRail controls and enabled controls for an OU.")
 controls_app = typer.Typer(no_args_is_help=True, help="List available GuardRail Controls.")
 ls_app.add_typer(controls_app, name="controls")
+ops_app = typer.Typer(no_args_is_help=True, help="Queries the local history of Control Operations.")
 
 
 def _print_list_of_guardrails(guardrail_list, header, do_print=True):
@@ -43,10 +52,11 @@ def _print_list_of_guardrails(guardrail_list, header, do_print=True):
         style="green",
         no_wrap=True,
     )
+    table.add_column("[bold]Behavior", style="magenta")
     table.add_column("[bold]Details", style="cyan")
 
     for gr in guardrail_list:
-        table.add_row(f"[bold]{gr.get('id')}", f"{gr.get('text')}")
+        table.add_row(f"[bold]{gr.id}", f"{gr.behavior}", f"{gr.text}")
     if do_print:
         console.print(table)
     return table
@@ -54,40 +64,59 @@ def _print_list_of_guardrails(guardrail_list, header, do_print=True):
 
 @ls_app.command("enabled-controls")
 def list_enabled_controls_for_organizational_unit(
-        organizational_unit: str = typer.Option(
-            ...,
+        organizational_units: List[str] = typer.Option(
+            None,
             "--organizational-unit",
             "-ou",
-            help="ID or Name of Organizational Unit to list its enabled controls. Try: `ls organizational-units` command",
-        )
+            help="ID or Name of Organizational Unit to list its enabled controls, can be repeated. Try: `ls organizational-units` command",
+        ),
+        all_organizational_units: bool = typer.Option(
+            False,
+            "--all",
+            help="List enabled controls for every Organizational Unit.",
+        ),
     ):
-    """CLI Command to list enabled controls for given organizational-unit"""
-    # get details of the given organizational unit
-    o_unit = find_organizational_unit_by_id_or_name(organizational_unit)
-    if not o_unit:
+    """CLI Command to list enabled controls for given organizational-units"""
+    # get details of the given organizational units
+    if all_organizational_units:
+        o_units = get_organizational_units()
+    else:
+        o_units = [find_organizational_unit_by_id_or_name(ou) for ou in organizational_units or []]
+    if not o_units or not all(o_units):
         raise typer.Exit(
             "Please provide a correct Organizational Unit ID. Try: `ls organizational-units` command"
         )
-    organizational_unit_arn = o_unit.get("Arn")
-    organizational_unit_id = o_unit.get("Id")
-    organizational_unit_name = o_unit.get("Name")
 
-    enabled_control_identifiers = _list_enabled_controls(organizational_unit_arn)
-
-    table = Table(
-        title=f"[bold]Enabled GuardRail Controls for O.U. [blue]{organizational_unit_name}[/] ([green]{organizational_unit_id}[/])",
-        title_style="white on black",
-    )
+    if len(o_units) == 1:
+        table = Table(
+            title=f"[bold]Enabled GuardRail Controls for O.U. [blue]{o_units[0].name}[/] ([green]{o_units[0].id}[/])",
+            title_style="white on black",
+        )
+    else:
+        table = Table(title=f"[bold]Enabled GuardRail Controls for [blue]{len(o_units)}[/] O.U.s", title_style="white on black")
+        table.add_column("[bold]O.U.", justify="left", style="green", no_wrap=True)
     table.add_column(
-        f"[bold][green]Enabled GuardRail Control Identifiers[/] on [blue]{organizational_unit_name}[/]",
+        f"[bold][green]Enabled GuardRail Control Identifiers[/]" + (f" on [blue]{o_units[0].name}[/]" if len(o_units) == 1 else ""),
         justify="left",
     )
 
-    for eci in enabled_control_identifiers:
-        before, after = eci.rsplit("/", 1)
-
-        table.add_row(f"[white]{before}/[bold][blue]{after}")
-    console.print(table)
+    def _add_enabled_control_rows(table, o_unit, enabled_controls):
+        ou_cells = [f"[bold]{o_unit.name}"] if len(o_units) > 1 else []
+        if isinstance(enabled_controls, ct_client.exceptions.ResourceNotFoundException):
+            table.add_row(*ou_cells, "[yellow]This Organizational Unit [bold]is not registered[/] with AWS Control Tower.")
+            return
+        if isinstance(enabled_controls, Exception):
+            table.add_row(*ou_cells, f"[red]Failed to list enabled guardrail controls: {enabled_controls}")
+            return
+        for enabled_control in enabled_controls:
+            table.add_row(*ou_cells, f"[white]{enabled_control.arn_prefix}[bold][blue]{enabled_control.control_id}")
+
+    live.stream_rows(
+        table,
+        {o_unit: aio.list_enabled_controls(o_unit.arn) for o_unit in o_units},
+        _add_enabled_control_rows,
+        description="Listing enabled controls",
+    )
 
 
 @ls_app.command("organizational-units")
@@ -104,7 +133,7 @@ def _list_ous():
 
     for ou in organizational_units:
         table.add_row(
-            f"[bold]{ou.get('Name')}", f"[bold]{ou.get('Id')}", f"{ou.get('Arn')}"
+            f"[bold]{ou.name}", f"[bold]{ou.id}", f"{ou.arn}"
         )
 
     console.print(table)
@@ -120,7 +149,7 @@ def _apply_strongly_recommended_controls(
         )
     ):
     """Applies `Strongly Recommended` GuardRail Controls to specified Organizational Unit."""
-    control_id_list = [_.get("id") for _ in guardrail_identifiers.STRONGLY_RECOMMENDED_GUARDRAILS]
+    control_id_list = [_.id for _ in get_guardrail_controls_by_category("strongly-recommended")]
     _apply_list_of_controls_to_organizational_unit(organizational_unit, control_id_list)
 
 @apply_app.command("control-from-file")
@@ -139,15 +168,113 @@ def _apply_control_to_organizational_unit_from_file(
     ),
 ):
     """Applies GuardRail Controls specified in a file to the given Organizational Unit."""
-    control_ids = _read_control_ids_from_file(control_id_file)
+    control_ids = preflight.skip_unavailable_controls(_read_control_ids_from_file(control_id_file))
     _apply_list_of_controls_to_organizational_unit(organizational_unit, control_ids)
 
 
+@apply_app.command("rollout")
+def _rollout_controls_in_waves(
+    waves_file: str = typer.Option(
+        ...,
+        "--waves-file",
+        "-wf",
+        help="Path to the file containing rollout waves, one wave per line with comma separated Organizational Unit IDs or Names.",
+    ),
+    control_id_file: str = typer.Option(
+        ...,
+        "--control-id-file",
+        "-cidf",
+        help="Path to the file containing Control Identifiers, one per line.",
+    ),
+    failure_threshold: float = typer.Option(
+        rollout.DEFAULT_FAILURE_THRESHOLD,
+        "--failure-threshold",
+        help="Halt the rollout when the failure rate of a wave is above this ratio (0.0 - 1.0).",
+    ),
+    poll_interval: int = typer.Option(
+        aio.DEFAULT_POLL_INTERVAL,
+        "--poll-interval",
+        help="Seconds between control operation status checks.",
+    ),
+    timeout: int = typer.Option(
+        rollout.DEFAULT_OPERATION_TIMEOUT,
+        "--timeout",
+        help="Seconds to wait for each control operation before counting it as failed and halting the rollout, 0 waits forever.",
+    ),
+):
+    """Enables GuardRail Controls wave by wave, e.g. canary Organizational Units first."""
+    waves = rollout.read_waves_from_file(waves_file)
+    control_ids = _read_control_ids_from_file(control_id_file)
+    if not waves or not control_ids:
+        print_error_panel("Please provide at least one wave and one Control Identifier.")
+        raise typer.Exit()
+    _, enabled_control_ids_by_ou = preflight.run_preflight_checks_or_exit([ou for wave in waves for ou in wave], control_ids)
+    ou_waves = [[find_organizational_unit_by_id_or_name(ou) for ou in wave] for wave in waves]
+
+    table = Table(title=f"[bold]Rollout of {len(control_ids)} Controls", title_style="black on white")
+    table.add_column("[bold]Wave", justify="center", style="white")
+    table.add_column("[bold]Organizational Units", justify="left", style="green")
+    table.add_column("[bold]Operations", justify="right", style="cyan")
+    for wave_number, wave in enumerate(ou_waves, start=1):
+        operation_count = len(rollout.wave_targets(wave, control_ids, enabled_control_ids_by_ou))
+        table.add_row(f"{wave_number}", ", ".join(ou.name for ou in wave), f"{operation_count}")
+    console.print(table)
+
+    do_apply = Confirm.ask(
+        f"\nAre you sure you want to roll out [bold][blue]{len(control_ids)}[/][/] Controls in [bold]{len(ou_waves)}[/] waves",
+        console=console,
+    )
+    if not do_apply:
+        raise typer.Abort()
+    rollout.run_rollout(
+        ou_waves,
+        control_ids,
+        failure_threshold=failure_threshold,
+        poll_interval=poll_interval,
+        timeout=timeout or None,
+        enabled_control_ids_by_ou=enabled_control_ids_by_ou,
+    )
+
+
 def _read_control_ids_from_file(file_path):
     with open(file_path, "r") as file:
         control_ids = file.read().splitlines()
     return control_ids
 
+# `ls controls --filter` expressions, applied to every `ls controls` listing
+_controls_filter = {}
+
+
+def _query_guardrails(category=None):
+    """Controls of the category matching the `--filter` expressions, a category filter narrows it down further."""
+    filters = dict(_controls_filter)
+    if category:
+        if filters.get("category", category) != category:
+            return []
+        filters["category"] = category
+    return catalog.query(**filters)
+
+
+@controls_app.callback(invoke_without_command=True)
+def _controls_options(
+    ctx: typer.Context,
+    filters: List[str] = typer.Option(
+        None,
+        "--filter",
+        "-f",
+        help="Filter controls by `category=`, `behavior=` (preventive/detective), `region=` or `text=`, can be repeated.",
+    ),
+):
+    """List available GuardRail Controls."""
+    try:
+        _controls_filter.update(catalog.parse_filters(filters))
+    except ValueError as e:
+        print_error_panel(str(e))
+        raise typer.Exit()
+    if ctx.invoked_subcommand is None:
+        _print_list_of_guardrails(_query_guardrails(), "GUARDRAILS")
+
+
 @controls_app.command("all")
 def _list_all_guardrails():
     """Lists all available GuardRail Controls."""
@@ -160,14 +287,14 @@ def _list_all_guardrails():
 def _list_elective_guardrails():
     """Lists Elective GuardRail Controls."""
     
-    _print_list_of_guardrails(guardrail_identifiers.ELECTIVE_GUARDRAILS, "ELECTIVE GUARDRAILS")
+    _print_list_of_guardrails(_query_guardrails("elective"), "ELECTIVE GUARDRAILS")
 
 
 @controls_app.command("data-residency")
 def _list_data_residency_guardrails():
     """Lists Data Residency GuardRail Controls."""
     
-    _print_list_of_guardrails(guardrail_identifiers.DATA_RESIDENCY_GUARDRAILS, "DATA RESIDENCY GUARDRAILS")
+    _print_list_of_guardrails(_query_guardrails("data-residency"), "DATA RESIDENCY GUARDRAILS")
 
 
 @controls_app.command("strongly-recommended")
@@ -175,7 +302,7 @@ def _list_strongly_recommended_guardrails():
     """Lists Strongly Recommended GuardRail Controls."""
     
     _print_list_of_guardrails(
-        guardrail_identifiers.STRONGLY_RECOMMENDED_GUARDRAILS, "STRONGLY RECOMMENDED GUARDRAILS"
+        _query_guardrails("strongly-recommended"), "STRONGLY RECOMMENDED GUARDRAILS"
     )
 
 
@@ -193,9 +320,14 @@ def _apply_control_to_organizational_unit_command(
         "-cid",
         help="Control Identifier. Try: `ls controls all` command",
     ),
+    wait: bool = typer.Option(
+        True,
+        "--wait/--no-wait",
+        help="Wait for the control operation to finish, or return once it is submitted.",
+    ),
 ):
     """Applies the specified GuardRail Control to the given Organizational Unit."""
-    is_applied = _apply_control_to_organizational_unit(organizational_unit, control_id)
+    is_applied = _apply_control_to_organizational_unit(organizational_unit, control_id, wait=wait)
 
 
 @remove_app.command("control")
@@ -212,16 +344,21 @@ def _remove_control_from_organizational_unit_command(
         "-cid",
         help="Control Identifier. Try: `ls controls all` command",
     ),
+    wait: bool = typer.Option(
+        True,
+        "--wait/--no-wait",
+        help="Wait for the control operation to finish, or return once it is submitted.",
+    ),
 ):
     """Removes the specified GuardRail Control from the given Organizational Unit."""
     
     is_removed = _remove_control_from_organizational_unit(
-        organizational_unit, control_id
+        organizational_unit, control_id, wait=wait
     )
 
 
 def _remove_control_from_organizational_unit(
-    ou_name_or_id, control_id, ask_for_prompt=True
+    ou_name_or_id, control_id, ask_for_prompt=True, wait=True
 ):
     control_dict = find_guardrail_control_by_id(control_id)
     if not control_dict:
@@ -232,7 +369,7 @@ def _remove_control_from_organizational_unit(
 
     control_arn = guardrail_identifiers.generate_guardrail_arn(control_id, AWS_REGION_NAME)
     control_panel = Panel(
-        f"\n[bold]{control_dict.get('text')}\n",
+        f"\n[bold]{control_dict.text}\n",
         title=f"Selected Control: [blue][bold]{control_id}",
         title_align="left",
         subtitle=f"[cyan]{control_arn}[/]",
@@ -246,10 +383,10 @@ def _remove_control_from_organizational_unit(
         raise typer.Exit()
 
     ou_panel = Panel(
-        f"\nId: [bold][green]{found_ou.get('Id')}[/][/]\nName: [bold][green]{found_ou.get('Name')}[/][/]\n",
-        title=f"Selected O.U.: [green][bold]{found_ou.get('Name')}",
+        f"\nId: [bold][green]{found_ou.id}[/][/]\nName: [bold][green]{found_ou.name}[/][/]\n",
+        title=f"Selected O.U.: [green][bold]{found_ou.name}",
         title_align="left",
-        subtitle=f"[cyan]{found_ou.get('Arn')}[/]",
+        subtitle=f"[cyan]{found_ou.arn}[/]",
     )
 
     console.print(
@@ -259,12 +396,12 @@ def _remove_control_from_organizational_unit(
             title_align='left'
         )
     )
-    found_ou_arn = found_ou.get("Arn")
+    found_ou_arn = found_ou.arn
 
     do_apply = True
     if ask_for_prompt:
         do_apply = Confirm.ask(
-            f"\nAre you sure you want to [bold][red]remove[/][/] [bold][blue]{control_id}[/][/] from [bold][green]{found_ou.get('Name')}[/][/]",
+            f"\nAre you sure you want to [bold][red]remove[/][/] [bold][blue]{control_id}[/][/] from [bold][green]{found_ou.name}[/][/]",
             console=console,
         )
         if not do_apply:
@@ -275,22 +412,41 @@ def _remove_control_from_organizational_unit(
             controlIdentifier=control_arn, targetIdentifier=found_ou_arn
         )
         operation_id = response.get("operationIdentifier", False)
-        print_success_panel(
-            f"\n[bold][green]Successfuly disabled[/] [bold][blue]{control_id}[/][/] from [bold][green]{found_ou.get('Name')}[/][/]"
-        )
-        return True
+        aio.record_submitted_operation(operation_id, control_arn, found_ou_arn, "DISABLE_CONTROL")
+        if not wait:
+            print_success_panel(
+                f"\n[bold][green]Started disabling[/] [bold][blue]{control_id}[/][/] from [bold][green]{found_ou.name}[/][/], operation [cyan]{operation_id}[/]. Try: [cyan]`ops history`[/] command"
+            )
+            return True
+        with console.status(f"[bold]Waiting for the control operation of [blue]{control_id}[/] on [green]{found_ou.name}[/]..."):
+            operation = aio.run(aio.wait_for_control_operation(operation_id, timeout=rollout.DEFAULT_OPERATION_TIMEOUT))
     # except ct_client.exceptions.ValidationException as e:
     # except ct_client.exceptions.ResourceNotFoundException as e:
+    except aio.ControlOperationTimeout:
+        print_warning_panel(
+            f"[bold]Control operation [cyan]{operation_id}[/] is still in progress after {rollout.DEFAULT_OPERATION_TIMEOUT} seconds.[/] "
+            f"It may still succeed on AWS Control Tower. Try: [cyan]`ops history --control-id {control_id}`[/] command"
+        )
+        return False
     except Exception as e:
         print_error_panel(
             f"[bold]Failed to remove control [blue]{control_arn}[/] on [green]{found_ou_arn}[/].[/]\n\n[red]Exception:[/] {str(e)}"
         )
         return False
+    if operation.status != "SUCCEEDED":
+        print_error_panel(
+            f"[bold]Failed to remove control [blue]{control_arn}[/] on [green]{found_ou_arn}[/].[/]\n\n[red]{operation.status}:[/] {operation.status_message}"
+        )
+        return False
+    print_success_panel(
+        f"\n[bold][green]Successfuly disabled[/] [bold][blue]{control_id}[/][/] from [bold][green]{found_ou.name}[/][/]"
+    )
+    return True
     pass
 
 
 def _apply_control_to_organizational_unit(
-    ou_name_or_id, control_id, ask_for_prompt=True
+    ou_name_or_id, control_id, ask_for_prompt=True, wait=True
 ):
     control_dict = find_guardrail_control_by_id(control_id)
     if not control_dict:
@@ -301,7 +457,7 @@ def _apply_control_to_organizational_unit(
     control_arn = guardrail_identifiers.generate_guardrail_arn(control_id, AWS_REGION_NAME)
 
     control_panel = Panel(
-        f"\n[bold]{control_dict.get('text')}\n",
+        f"\n[bold]{control_dict.text}\n",
         title=f"Selected Control: [blue][bold]{control_id}",
         title_align="left",
         subtitle=f"[cyan]{control_arn}[/]",
@@ -315,10 +471,10 @@ def _apply_control_to_organizational_unit(
         raise typer.Exit()
 
     ou_panel = Panel(
-        f"\nId: [bold][green]{found_ou.get('Id')}[/][/]\nName: [bold][green]{found_ou.get('Name')}[/][/]\n",
-        title=f"Selected O.U.: [green][bold]{found_ou.get('Name')}",
+        f"\nId: [bold][green]{found_ou.id}[/][/]\nName: [bold][green]{found_ou.name}[/][/]\n",
+        title=f"Selected O.U.: [green][bold]{found_ou.name}",
         title_align="left",
-        subtitle=f"[cyan]{found_ou.get('Arn')}[/]",
+        subtitle=f"[cyan]{found_ou.arn}[/]",
     )
 
     console.print(
@@ -329,12 +485,12 @@ def _apply_control_to_organizational_unit(
         )
     )
 
-    found_ou_arn = found_ou.get("Arn")
+    found_ou_arn = found_ou.arn
 
     do_apply = True
     if ask_for_prompt:
         do_apply = Confirm.ask(
-            f"\nAre you sure you want to enable [bold][blue]{control_id}[/][/] on [bold][green]{found_ou.get('Name')}[/][/]",
+            f"\nAre you sure you want to enable [bold][blue]{control_id}[/][/] on [bold][green]{found_ou.name}[/][/]",
             console=console,
         )
         if not do_apply:
@@ -345,17 +501,36 @@ def _apply_control_to_organizational_unit(
             controlIdentifier=control_arn, targetIdentifier=found_ou_arn
         )
         operation_id = response.get("operationIdentifier", False)
-        print_success_panel(
-            f"\n[bold][green]Successfuly enabled[/] [bold][blue]{control_id}[/][/] on [bold][green]{found_ou.get('Name')}[/][/]"
-        )
-        return True
+        aio.record_submitted_operation(operation_id, control_arn, found_ou_arn, "ENABLE_CONTROL")
+        if not wait:
+            print_success_panel(
+                f"\n[bold][green]Started enabling[/] [bold][blue]{control_id}[/][/] on [bold][green]{found_ou.name}[/][/], operation [cyan]{operation_id}[/]. Try: [cyan]`ops history`[/] command"
+            )
+            return True
+        with console.status(f"[bold]Waiting for the control operation of [blue]{control_id}[/] on [green]{found_ou.name}[/]..."):
+            operation = aio.run(aio.wait_for_control_operation(operation_id, timeout=rollout.DEFAULT_OPERATION_TIMEOUT))
     # except ct_client.exceptions.ValidationException as e:
     # except ct_client.exceptions.ResourceNotFoundException as e:
+    except aio.ControlOperationTimeout:
+        print_warning_panel(
+            f"[bold]Control operation [cyan]{operation_id}[/] is still in progress after {rollout.DEFAULT_OPERATION_TIMEOUT} seconds.[/] "
+            f"It may still succeed on AWS Control Tower. Try: [cyan]`ops history --control-id {control_id}`[/] command"
+        )
+        return False
     except Exception as e:
         print_error_panel(
             f"[bold]Failed to apply control [blue]{control_arn}[/] on [green]{found_ou_arn}[/].[/]\n\n[red]Exception:[/] {str(e)}"
         )
         return False
+    if operation.status != "SUCCEEDED":
+        print_error_panel(
+            f"[bold]Failed to apply control [blue]{control_arn}[/] on [green]{found_ou_arn}[/].[/]\n\n[red]{operation.status}:[/] {operation.status_message}"
+        )
+        return False
+    print_success_panel(
+        f"\n[bold][green]Successfuly enabled[/] [bold][blue]{control_id}[/][/] on [bold][green]{found_ou.name}[/][/]"
+    )
+    return True
 
     # operation_data = _get_control_operation(operation_id)
     # table = Table()
@@ -371,9 +546,87 @@ def diff_enabled_controls_and_control_list(control_list):
     pass
 def _apply_list_of_controls_to_organizational_unit(ou_name_or_id, control_id_list):
     # TODO: ask for prompt
-    
-    
-    for control_id in control_id_list:
-        _apply_control_to_organizational_unit(
-            ou_name_or_id, control_id, ask_for_prompt=False
+    control_id_list = preflight.skip_unavailable_controls(control_id_list)
+    if not control_id_list:
+        print_error_panel(f"None of the given Controls are available in region [bold]{AWS_REGION_NAME}[/]. No changes are made.")
+        raise typer.Exit()
+    (found_ou,), enabled_control_ids_by_ou = preflight.run_preflight_checks_or_exit([ou_name_or_id], control_id_list)
+    targets = rollout.wave_targets([found_ou], control_id_list, enabled_control_ids_by_ou)
+    rollout.print_already_enabled([found_ou], control_id_list, targets)
+    if not targets:
+        print_success_panel(f"Every given Control is already enabled on [bold][green]{found_ou.name}[/][/]. No changes are made.")
+        return []
+
+    with ControlOperationsProgress(
+        f"Enabling Controls on {found_ou.name}", rollout.wave_progress_targets(targets)
+    ) as operations_progress:
+        results = aio.run(rollout.run_wave(targets, operations_progress=operations_progress))
+
+    for _, control_id, result in results:
+        control_arn = guardrail_identifiers.generate_guardrail_arn(control_id, AWS_REGION_NAME)
+        if isinstance(result, Exception):
+            print_error_panel(
+                f"[bold]Failed to apply control [blue]{control_arn}[/] on [green]{found_ou.arn}[/].[/]\n\n[red]Exception:[/] {str(result)}"
+            )
+        elif result.status != "SUCCEEDED":
+            print_error_panel(
+                f"[bold]Failed to apply control [blue]{control_arn}[/] on [green]{found_ou.arn}[/].[/]\n\n[red]{result.status}:[/] {result.status_message}"
+            )
+        else:
+            print_success_panel(
+                f"\n[bold][green]Successfuly enabled[/] [bold][blue]{control_id}[/][/] on [bold][green]{found_ou.name}[/][/]"
+            )
+    return results
+
+
+def _format_duration(seconds):
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+@ops_app.command("history")
+def _list_control_operation_history(
+    limit: int = typer.Option(20, "--limit", "-n", help="Number of rows to show."),
+    operation_type: str = typer.Option(
+        None, "--operation-type", help="Only show ENABLE_CONTROL or DISABLE_CONTROL operations."
+    ),
+    control_id: str = typer.Option(
+        None, "--control-id", "-cid", help="Show the latest operations of this Control instead of the slowest Controls."
+    ),
+):
+    """Lists the slowest GuardRail Controls, or the latest operations of a Control, from the local history."""
+    with console.status("[bold]Updating control operations that are still in progress..."):
+        aio.run(aio.reconcile_in_progress_operations())
+    if control_id:
+        table = Table(title=f"[bold]Latest Operations of [blue]{control_id}[/]", title_style="black on white")
+        table.add_column("[bold]Operation", justify="left", style="white", no_wrap=True)
+        table.add_column("[bold]Type", justify="left", style="cyan")
+        table.add_column("[bold]O.U.", justify="left", style="green")
+        table.add_column("[bold]Status", justify="left")
+        table.add_column("[bold]Duration", justify="right")
+        for row in history.recent_operations(limit=limit, control_id=control_id):
+            table.add_row(
+                row["operation_id"], row["operation_type"], row["organizational_unit_arn"], row["status"], _format_duration(row["duration"])
+            )
+        console.print(table)
+        return
+
+    table = Table(title=f"[bold]Slowest GuardRail Controls", title_style="black on white")
+    table.add_column("[bold]Control", justify="left", style="blue", no_wrap=True)
+    table.add_column("[bold]Type", justify="left", style="cyan")
+    table.add_column("[bold]Operations", justify="right")
+    table.add_column("[bold]Avg. Duration", justify="right")
+    table.add_column("[bold]Max. Duration", justify="right")
+    table.add_column("[bold]Failed", justify="right", style="red")
+    for row in history.slowest_controls(limit=limit, operation_type=operation_type):
+        table.add_row(
+            row["control_id"],
+            row["operation_type"],
+            f"{row['operation_count']}",
+            _format_duration(row["average_duration"]),
+            _format_duration(row["max_duration"]),
+            f"{row['failed_count']}",
         )
+    console.print(table)
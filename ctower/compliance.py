@@ -0,0 +1,259 @@
+from collections import Counter
+from functools import lru_cache
+from typing import List
+
+import typer
+from botocore.credentials import AssumeRoleCredentialFetcher
+from rich.table import Table
+
+from . import aio
+from . import catalog
+from . import live
+from .models import ControlCompliance
+from .multiorg import get_credential_cache
+from .utilities import (
+    boto_client_config,
+    get_boto_session,
+    get_organizational_units,
+    get_rich_console,
+    find_organizational_unit_by_id_or_name,
+    print_error_panel,
+)
+
+# Compliance sweep of detective GuardRail Controls. Control Tower deploys every detective control as an
+# AWS Config rule named `AWSControlTower_<control id>` in each enrolled account, so the sweep assumes a role
+# into every account of the target OUs and reads the rule compliance of the current region in bulk.
+
+session = get_boto_session()
+console = get_rich_console()
+AWS_REGION_NAME = session.region_name
+
+DEFAULT_ROLE_NAME = "AWSControlTowerExecution"
+CONFIG_RULE_PREFIX = "AWSControlTower_"
+ROLE_SESSION_NAME = "ctower-compliance"
+
+
+@lru_cache(maxsize=None)
+def get_sts_client():
+    return session.client("sts", config=boto_client_config)
+
+
+_config_clients = {}
+
+
+async def get_account_config_client(account_id, role_name=DEFAULT_ROLE_NAME):
+    """Returns an AWS Config client for the account, assumed role credentials are cached on disk like the AWS CLI.
+
+    The shared session is not thread safe, so clients are created on the event loop thread and only the
+    AssumeRole call runs in the executor.
+    """
+    key = (account_id, role_name)
+    if key not in _config_clients:
+        sts_client = get_sts_client()
+        fetcher = AssumeRoleCredentialFetcher(
+            client_creator=lambda *args, **kwargs: sts_client,
+            source_credentials=session.get_credentials(),
+            role_arn=f"arn:aws:iam::{account_id}:role/{role_name}",
+            extra_args={"RoleSessionName": ROLE_SESSION_NAME},
+            cache=get_credential_cache(),
+        )
+        credentials = await aio.fetch_credentials(fetcher)
+        _config_clients[key] = session.client(
+            "config",
+            aws_access_key_id=credentials["access_key"],
+            aws_secret_access_key=credentials["secret_key"],
+            aws_session_token=credentials["token"],
+            config=boto_client_config,
+        )
+    return _config_clients[key]
+
+
+def control_id_from_config_rule_name(config_rule_name, control_ids):
+    """Returns the control id of a Control Tower managed Config rule, None for any other rule."""
+    if not config_rule_name.startswith(CONFIG_RULE_PREFIX):
+        return None
+    control_id = config_rule_name[len(CONFIG_RULE_PREFIX):]
+    return control_id if control_id in control_ids else None
+
+
+async def get_account_compliance(account, role_name=DEFAULT_ROLE_NAME, control_ids=None):
+    """Returns a ControlCompliance for every detective control deployed in the account."""
+    control_ids = control_ids or {control.id for control in catalog.query(behavior="detective")}
+    client = await get_account_config_client(account.id, role_name)
+    compliances = await aio.list_compliance_by_config_rule(client)
+    results = []
+    for compliance_dict in compliances:
+        control_id = control_id_from_config_rule_name(compliance_dict.get("ConfigRuleName", ""), control_ids)
+        if control_id:
+            results.append(ControlCompliance.from_dict(compliance_dict, account_id=account.id, control_id=control_id))
+    return results
+
+
+async def list_accounts(organizational_units):
+    """Returns {ou: [active Account] or exception}."""
+    results = await aio.gather_with_concurrency(
+        [aio.list_accounts_for_organizational_unit(ou) for ou in organizational_units]
+    )
+    return {
+        ou: result if isinstance(result, Exception) else [account for account in result if account.status == "ACTIVE"]
+        for ou, result in zip(organizational_units, results)
+    }
+
+
+def aggregate_by_organizational_unit(results):
+    """Per OU counts from {(ou, account): [ControlCompliance] or exception}."""
+    summaries = {}
+    for (ou, account), compliances in results.items():
+        summary = summaries.setdefault(ou, Counter())
+        summary["accounts"] += 1
+        if isinstance(compliances, Exception):
+            summary["failed_accounts"] += 1
+            continue
+        compliance_types = Counter(compliance.compliance_type for compliance in compliances)
+        summary["non_compliant_controls"] += compliance_types["NON_COMPLIANT"]
+        if compliance_types["NON_COMPLIANT"]:
+            summary["non_compliant_accounts"] += 1
+        else:
+            summary["compliant_accounts"] += 1
+    return summaries
+
+
+def aggregate_by_control(results):
+    """Per control account counts by compliance type, non compliant resources and accounts."""
+    summaries = {}
+    for (ou, account), compliances in results.items():
+        if isinstance(compliances, Exception):
+            continue
+        for compliance in compliances:
+            summary = summaries.setdefault(compliance.control_id, {"counts": Counter(), "non_compliant_accounts": []})
+            summary["counts"][compliance.compliance_type] += 1
+            if compliance.compliance_type == "NON_COMPLIANT":
+                summary["counts"]["non_compliant_resources"] += compliance.non_compliant_resource_count
+                summary["non_compliant_accounts"].append(account)
+    return dict(sorted(summaries.items(), key=lambda item: -item[1]["counts"]["NON_COMPLIANT"]))
+
+
+def _print_organizational_unit_summary(results):
+    table = Table(title="[bold]Compliance by O.U.", title_style="black on white")
+    table.add_column("[bold]O.U.", justify="left", style="green", no_wrap=True)
+    table.add_column("[bold]Accounts", justify="right")
+    table.add_column("[bold]Compliant", justify="right", style="green")
+    table.add_column("[bold]Non Compliant", justify="right", style="red")
+    table.add_column("[bold]Failed", justify="right", style="yellow")
+    table.add_column("[bold]Non Compliant Controls", justify="right", style="red")
+    for ou, summary in aggregate_by_organizational_unit(results).items():
+        table.add_row(
+            f"[bold]{ou.name}",
+            f"{summary['accounts']}",
+            f"{summary['compliant_accounts']}",
+            f"{summary['non_compliant_accounts']}",
+            f"{summary['failed_accounts']}",
+            f"{summary['non_compliant_controls']}",
+        )
+    console.print(table)
+
+
+def _print_control_summary(results):
+    table = Table(title="[bold]Compliance by Control", title_style="white on black")
+    table.add_column("[bold]Control", justify="left", style="blue", no_wrap=True)
+    table.add_column("[bold]Compliant", justify="right", style="green")
+    table.add_column("[bold]Non Compliant", justify="right", style="red")
+    table.add_column("[bold]No Data", justify="right", style="yellow")
+    table.add_column("[bold]Resources", justify="right", style="red")
+    table.add_column("[bold]Non Compliant Accounts", justify="left")
+    for control_id, summary in aggregate_by_control(results).items():
+        counts = summary["counts"]
+        table.add_row(
+            f"[bold]{control_id}",
+            f"{counts['COMPLIANT']}",
+            f"{counts['NON_COMPLIANT']}",
+            f"{counts['INSUFFICIENT_DATA'] + counts['NOT_APPLICABLE']}",
+            f"{counts['non_compliant_resources']}",
+            "\n".join(f"{account.name} ({account.id})" for account in summary["non_compliant_accounts"]),
+        )
+    console.print(table)
+
+
+def _add_account_row(table, key, compliances):
+    ou, account = key
+    if isinstance(compliances, Exception):
+        table.add_row(f"[bold]{ou.name}", f"[bold]{account.name}", account.id, "-", "-", f"[red]{compliances}")
+        return
+    compliance_types = Counter(compliance.compliance_type for compliance in compliances)
+    status = "[red]NON_COMPLIANT" if compliance_types["NON_COMPLIANT"] else "[green]COMPLIANT"
+    if not compliances:
+        status = "[yellow]No detective controls found"
+    table.add_row(
+        f"[bold]{ou.name}",
+        f"[bold]{account.name}",
+        account.id,
+        f"{compliance_types['COMPLIANT']}",
+        f"{compliance_types['NON_COMPLIANT']}",
+        status,
+    )
+
+
+def check_compliance(
+    organizational_units: List[str] = typer.Option(
+        None,
+        "--organizational-unit",
+        "-ou",
+        help="ID or Name of Organizational Unit to check the accounts of, can be repeated. Try: `ls organizational-units` command",
+    ),
+    all_organizational_units: bool = typer.Option(
+        False,
+        "--all",
+        help="Check the accounts of every Organizational Unit.",
+    ),
+    role_name: str = typer.Option(
+        DEFAULT_ROLE_NAME,
+        "--role-name",
+        "-r",
+        help="Role to assume in each member account.",
+    ),
+    concurrency: int = typer.Option(
+        aio.MAX_CONCURRENCY,
+        "--concurrency",
+        help="Maximum number of accounts checked at once.",
+    ),
+):
+    """Checks AWS Config compliance of detective GuardRail Controls in every account of the given Organizational Units."""
+    if all_organizational_units:
+        o_units = get_organizational_units()
+    else:
+        o_units = [find_organizational_unit_by_id_or_name(ou) for ou in organizational_units or []]
+    if not o_units or not all(o_units):
+        print_error_panel("Please provide a correct Organizational Unit ID. Try: [cyan]`ls organizational-units`[/] command")
+        raise typer.Exit()
+
+    with console.status(f"[bold]Listing accounts of [blue]{len(o_units)}[/] Organizational Units..."):
+        accounts_by_ou = aio.run(list_accounts(o_units))
+    for ou, accounts in accounts_by_ou.items():
+        if isinstance(accounts, Exception):
+            print_error_panel(f"Failed to list accounts of O.U. [green][bold]{ou.name}[/][/]: {accounts}")
+            raise typer.Exit()
+
+    control_ids = {control.id for control in catalog.query(behavior="detective")}
+    table = Table(title=f"[bold]Detective Control Compliance in [blue]{AWS_REGION_NAME}[/]", title_style="white on black")
+    table.add_column("[bold]O.U.", justify="left", style="green", no_wrap=True)
+    table.add_column("[bold]Account", justify="left", no_wrap=True)
+    table.add_column("[bold]Identifier", justify="left", style="cyan", no_wrap=True)
+    table.add_column("[bold]Compliant", justify="right", style="green")
+    table.add_column("[bold]Non Compliant", justify="right", style="red")
+    table.add_column("[bold]Status", justify="left")
+    results = live.stream_rows(
+        table,
+        {
+            (ou, account): get_account_compliance(account, role_name=role_name, control_ids=control_ids)
+            for ou, accounts in accounts_by_ou.items()
+            for account in accounts
+        },
+        _add_account_row,
+        description="Checking account compliance",
+        limit=max(concurrency, 1),
+    )
+    if not results:
+        print_error_panel("There are [bold]no active accounts[/] in the given Organizational Units.")
+        raise typer.Exit()
+    _print_organizational_unit_summary(results)
+    _print_control_summary(results)
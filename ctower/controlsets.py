@@ -0,0 +1,254 @@
+from functools import reduce
+
+import typer
+from rich.table import Table
+
+from . import aio
+from . import state
+from .models import OrganizationalUnit, EnabledControl
+from .utilities import (
+    get_rich_console,
+    get_guardrail_controls,
+    get_organizational_units,
+    find_organizational_unit_by_id_or_name,
+    print_error_panel,
+)
+
+# Control sets encoded as bitsets: every catalog control gets a bit position and an OU's enabled controls
+# become a single Python int. Set algebra and similarity over hundreds of OUs are then plain integer ops.
+
+console = get_rich_console()
+
+analyze_app = typer.Typer(no_args_is_help=True, help="Analyzes enabled GuardRail Controls across Organizational Units.")
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+def jaccard_similarity(bits_a, bits_b):
+    union = bits_a | bits_b
+    if not union:
+        return 1.0
+    return popcount(bits_a & bits_b) / popcount(union)
+
+
+class ControlSetIndex:
+    """Maps control ids to bit positions, catalog controls first. Unknown ids get the next free bit."""
+
+    def __init__(self, control_ids=()):
+        self.control_ids = []
+        self.positions = {}
+        for control_id in control_ids:
+            self.add(control_id)
+
+    @classmethod
+    def from_catalog(cls):
+        return cls(get_guardrail_controls().keys())
+
+    def add(self, control_id):
+        position = self.positions.get(control_id)
+        if position is None:
+            position = self.positions[control_id] = len(self.control_ids)
+            self.control_ids.append(control_id)
+        return position
+
+    def encode(self, control_ids):
+        bits = 0
+        for control_id in control_ids:
+            bits |= 1 << self.add(control_id)
+        return bits
+
+    def decode(self, bits):
+        control_ids = []
+        position = 0
+        while bits:
+            if bits & 1:
+                control_ids.append(self.control_ids[position])
+            bits >>= 1
+            position += 1
+        return control_ids
+
+
+def group_identical(bits_by_ou):
+    """Groups OUs with exactly the same control set, largest groups first."""
+    groups = {}
+    for ou, bits in bits_by_ou.items():
+        groups.setdefault(bits, []).append(ou)
+    return sorted(groups.items(), key=lambda item: -len(item[1]))
+
+
+def common_core(bits_by_ou):
+    """Controls enabled on every OU."""
+    return reduce(lambda bits_a, bits_b: bits_a & bits_b, bits_by_ou.values()) if bits_by_ou else 0
+
+
+def rank_by_similarity(golden_bits, bits_by_ou):
+    """Returns (ou, similarity, missing bits, extra bits) sorted from the closest OU."""
+    ranked = [
+        (ou, jaccard_similarity(golden_bits, bits), golden_bits & ~bits, bits & ~golden_bits)
+        for ou, bits in bits_by_ou.items()
+    ]
+    return sorted(ranked, key=lambda item: -item[1])
+
+
+def cluster(bits_by_ou, threshold):
+    """Leader clustering: each distinct control set joins the first cluster whose leader is at least
+    `threshold` similar, otherwise starts a new cluster. Returns a list of (leader bits, [ou])."""
+    clusters = []
+    for bits, ous in group_identical(bits_by_ou):
+        for leader_bits, members in clusters:
+            if jaccard_similarity(leader_bits, bits) >= threshold:
+                members.extend(ous)
+                break
+        else:
+            clusters.append((bits, list(ous)))
+    return clusters
+
+
+def find_organizational_unit(bits_by_ou, id_or_name):
+    """Finds an OU of the loaded control sets by ID, then by name, so OUs only in the local state are found too."""
+    return next((ou for ou in bits_by_ou if ou.id == id_or_name), None) or next(
+        (ou for ou in bits_by_ou if ou.name == id_or_name), None
+    )
+
+
+def load_control_sets(from_state=False, include_mandatory=False):
+    """Returns (ControlSetIndex, {OrganizationalUnit: bits}) from the local state or a live sweep."""
+    index = ControlSetIndex.from_catalog()
+    enabled_control_ids_by_ou = {}
+    if from_state:
+        local_state = state.load_state()
+        if not local_state:
+            print_error_panel("There is no local state. Try: [cyan]`state baseline`[/] command")
+            raise typer.Exit()
+        for ou_dict in local_state["organizational_units"].values():
+            ou = OrganizationalUnit.from_dict(ou_dict)
+            enabled_control_ids_by_ou[ou] = [
+                EnabledControl.from_arn(arn).control_id for arn in local_state["enabled_controls"].get(ou.arn, [])
+            ]
+    else:
+        organizational_units = get_organizational_units()
+        with console.status(f"[bold]Listing enabled controls for [blue]{len(organizational_units)}[/] Organizational Units..."):
+            results = aio.run(aio.list_enabled_controls_for_organizational_units(organizational_units))
+        for ou in organizational_units:
+            result = results[ou.arn]
+            if isinstance(result, Exception):
+                console.print(f"[yellow]Skipping O.U. [bold]{ou.name}[/]: {result}")
+                continue
+            enabled_control_ids_by_ou[ou] = [enabled_control.control_id for enabled_control in result]
+
+    mandatory_bits = 0
+    if not include_mandatory:
+        mandatory_bits = index.encode(
+            control.id for control in get_guardrail_controls().values() if control.category == "mandatory"
+        )
+    bits_by_ou = {
+        ou: index.encode(control_ids) & ~mandatory_bits for ou, control_ids in enabled_control_ids_by_ou.items()
+    }
+    return index, bits_by_ou
+
+
+def _format_control_ids(index, bits):
+    return "\n".join(sorted(index.decode(bits))) or "-"
+
+
+from_state_option = typer.Option(
+    False, "--from-state", help="Use the local state (`state baseline`) instead of listing enabled controls."
+)
+include_mandatory_option = typer.Option(
+    False, "--include-mandatory", help="Include the mandatory Control Tower controls enabled on every OU."
+)
+
+
+@analyze_app.command("identical")
+def _analyze_identical_baselines(
+    from_state: bool = from_state_option,
+    include_mandatory: bool = include_mandatory_option,
+):
+    """Groups Organizational Units that have identical enabled controls."""
+    index, bits_by_ou = load_control_sets(from_state, include_mandatory)
+    table = Table(title=f"[bold]Identical Control Baselines", title_style="black on white")
+    table.add_column("[bold]Organizational Units", justify="left", style="green")
+    table.add_column("[bold]Count", justify="right", style="white")
+    table.add_column("[bold]Enabled Controls", justify="left", style="blue")
+    for bits, ous in group_identical(bits_by_ou):
+        table.add_row("\n".join(ou.name for ou in ous), f"{popcount(bits)}", _format_control_ids(index, bits))
+    console.print(table)
+
+
+@analyze_app.command("common-core")
+def _analyze_common_core(
+    from_state: bool = from_state_option,
+    include_mandatory: bool = include_mandatory_option,
+):
+    """Lists controls enabled on every Organizational Unit."""
+    index, bits_by_ou = load_control_sets(from_state, include_mandatory)
+    core_bits = common_core(bits_by_ou)
+    table = Table(
+        title=f"[bold]Common Core Controls",
+        title_style="black on white",
+        caption=f"Enabled on all {len(bits_by_ou)} Organizational Units",
+    )
+    table.add_column("[bold]Control", justify="left", style="blue", min_width=40)
+    for control_id in sorted(index.decode(core_bits)):
+        table.add_row(control_id)
+    console.print(table)
+
+
+@analyze_app.command("closest")
+def _analyze_closest_to_golden(
+    golden_organizational_unit: str = typer.Option(
+        ...,
+        "--golden-organizational-unit",
+        "-gou",
+        help="ID or Name of the Organizational Unit to compare the others to.",
+    ),
+    from_state: bool = from_state_option,
+    include_mandatory: bool = include_mandatory_option,
+):
+    """Ranks Organizational Units by their similarity to a golden Organizational Unit."""
+    index, bits_by_ou = load_control_sets(from_state, include_mandatory)
+    golden_ou = find_organizational_unit(bits_by_ou, golden_organizational_unit)
+    if not golden_ou:
+        if not from_state and find_organizational_unit_by_id_or_name(golden_organizational_unit):
+            print_error_panel(f"There are no enabled controls listed for [green]{golden_organizational_unit}[/].")
+        else:
+            print_error_panel(
+                "Please provide a correct Organizational Unit ID for [blue]`--golden-organizational-unit`[/]. "
+                + ("Try: `state show` command" if from_state else "Try: `ls organizational-units` command")
+            )
+        raise typer.Exit()
+    golden_bits = bits_by_ou[golden_ou]
+
+    table = Table(title=f"[bold]Similarity to [green]{golden_ou.name}[/]", title_style="black on white")
+    table.add_column("[bold]O.U.", justify="left", style="green", no_wrap=True)
+    table.add_column("[bold]Similarity", justify="right", style="white")
+    table.add_column("[bold]Missing Controls", justify="left", style="red")
+    table.add_column("[bold]Extra Controls", justify="left", style="blue")
+    others = {ou: bits for ou, bits in bits_by_ou.items() if ou.id != golden_ou.id}
+    for ou, similarity, missing_bits, extra_bits in rank_by_similarity(golden_bits, others):
+        table.add_row(
+            f"[bold]{ou.name}", f"{similarity:.0%}", _format_control_ids(index, missing_bits), _format_control_ids(index, extra_bits)
+        )
+    console.print(table)
+
+
+@analyze_app.command("clusters")
+def _analyze_clusters(
+    threshold: float = typer.Option(
+        0.8, "--threshold", "-t", help="Minimum Jaccard similarity (0.0 - 1.0) to the cluster's first control set."
+    ),
+    from_state: bool = from_state_option,
+    include_mandatory: bool = include_mandatory_option,
+):
+    """Clusters Organizational Units with similar enabled controls."""
+    index, bits_by_ou = load_control_sets(from_state, include_mandatory)
+    table = Table(title=f"[bold]Control Baseline Clusters (similarity >= {threshold:.0%})", title_style="black on white")
+    table.add_column("[bold]Cluster", justify="center", style="white")
+    table.add_column("[bold]Organizational Units", justify="left", style="green")
+    table.add_column("[bold]Shared Controls", justify="left", style="blue")
+    for cluster_number, (_, ous) in enumerate(cluster(bits_by_ou, threshold), start=1):
+        shared_bits = common_core({ou: bits_by_ou[ou] for ou in ous})
+        table.add_row(f"{cluster_number}", "\n".join(ou.name for ou in ous), _format_control_ids(index, shared_bits))
+    console.print(table)
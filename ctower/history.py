@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+# Local SQLite history of control operations submitted by ctower.
+# Durations of finished operations are used to estimate how long bulk operations will take.
+
+HISTORY_DB_PATH = os.environ.get(
+    "CTOWER_HISTORY_DB", os.path.join(os.path.expanduser("~"), ".ctower", "history.db")
+)
+# used when there is no finished operation in the history yet
+DEFAULT_EXPECTED_DURATION = 120.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS control_operations (
+    operation_id TEXT PRIMARY KEY,
+    control_id TEXT NOT NULL,
+    organizational_unit_arn TEXT NOT NULL,
+    operation_type TEXT NOT NULL,
+    region TEXT,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    status TEXT NOT NULL,
+    status_message TEXT
+);
+CREATE INDEX IF NOT EXISTS control_operations_control_id ON control_operations (control_id, operation_type);
+"""
+
+_lock = threading.Lock()
+# turned off while replaying a recording, so replayed operations never overwrite real ones
+_writes_enabled = [True]
+
+
+def disable_writes():
+    _writes_enabled[0] = False
+
+
+@lru_cache(maxsize=None)
+def _get_connection(path=HISTORY_DB_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _execute(query, parameters=()):
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            return connection.execute(query, parameters).fetchall()
+
+
+def record_submitted(operation_id, control_id, organizational_unit_arn, operation_type, region=None, submitted_at=None):
+    if not _writes_enabled[0]:
+        return
+    _execute(
+        "INSERT OR REPLACE INTO control_operations "
+        "(operation_id, control_id, organizational_unit_arn, operation_type, region, submitted_at, status) "
+        "VALUES (?, ?, ?, ?, ?, ?, 'IN_PROGRESS')",
+        (operation_id, control_id, organizational_unit_arn, operation_type, region, submitted_at or time.time()),
+    )
+
+
+def record_finished(operation):
+    """Stores the final status of a ControlOperation.
+
+    Control Tower's own start and end times are kept when both are reported, so durations never mix clocks.
+    """
+    if not _writes_enabled[0]:
+        return
+    started_at = None
+    finished_at = time.time()
+    if operation.start_time and operation.end_time:
+        started_at = operation.start_time.timestamp()
+        finished_at = operation.end_time.timestamp()
+    _execute(
+        "UPDATE control_operations SET started_at = ?, finished_at = ?, status = ?, status_message = ? WHERE operation_id = ?",
+        (started_at, finished_at, operation.status, operation.status_message, operation.operation_id),
+    )
+
+
+def in_progress_operation_ids(region=None):
+    """Operations that have no final status in the history yet, e.g. submitted by an interrupted run."""
+    query = "SELECT operation_id FROM control_operations WHERE status = 'IN_PROGRESS' "
+    parameters = []
+    if region:
+        query += "AND region = ? "
+        parameters.append(region)
+    return [row["operation_id"] for row in _execute(query, parameters)]
+
+
+def expected_duration(control_id, operation_type):
+    """Average duration of succeeded operations of this control, then of any control, in seconds."""
+    for query, parameters in (
+        (
+            "SELECT AVG(finished_at - COALESCE(started_at, submitted_at)) FROM control_operations "
+            "WHERE status = 'SUCCEEDED' AND control_id = ? AND operation_type = ?",
+            (control_id, operation_type),
+        ),
+        (
+            "SELECT AVG(finished_at - COALESCE(started_at, submitted_at)) FROM control_operations "
+            "WHERE status = 'SUCCEEDED' AND operation_type = ?",
+            (operation_type,),
+        ),
+    ):
+        average = _execute(query, parameters)[0][0]
+        if average is not None:
+            return average
+    return DEFAULT_EXPECTED_DURATION
+
+
+def slowest_controls(limit=20, operation_type=None):
+    """Per control and operation type: count, average/max duration and failures, slowest first."""
+    query = (
+        "SELECT control_id, operation_type, COUNT(*) AS operation_count, "
+        "AVG(CASE WHEN status = 'SUCCEEDED' THEN finished_at - COALESCE(started_at, submitted_at) END) AS average_duration, "
+        "MAX(CASE WHEN status = 'SUCCEEDED' THEN finished_at - COALESCE(started_at, submitted_at) END) AS max_duration, "
+        "SUM(CASE WHEN status = 'FAILED' THEN 1 ELSE 0 END) AS failed_count "
+        "FROM control_operations "
+    )
+    parameters = []
+    if operation_type:
+        query += "WHERE operation_type = ? "
+        parameters.append(operation_type)
+    query += "GROUP BY control_id, operation_type ORDER BY average_duration IS NULL, average_duration DESC LIMIT ?"
+    parameters.append(limit)
+    return _execute(query, parameters)
+
+
+def recent_operations(limit=20, control_id=None):
+    query = "SELECT *, finished_at - COALESCE(started_at, submitted_at) AS duration FROM control_operations "
+    parameters = []
+    if control_id:
+        query += "WHERE control_id = ? "
+        parameters.append(control_id)
+    query += "ORDER BY submitted_at DESC LIMIT ?"
+    parameters.append(limit)
+    return _execute(query, parameters)
+
+
+def finished_operations():
+    """Control id, operation type, status and duration of every finished operation."""
+    return _execute(
+        "SELECT control_id, operation_type, status, finished_at - COALESCE(started_at, submitted_at) AS duration "
+        "FROM control_operations WHERE finished_at IS NOT NULL"
+    )
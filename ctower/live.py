@@ -0,0 +1,52 @@
+import asyncio
+
+from rich.console import Group
+from rich.live import Live
+from rich.spinner import Spinner
+
+from . import aio
+from .utilities import get_rich_console
+
+# Progressive rendering: rows are added to a Rich table as soon as each call returns,
+# while a spinner shows the calls that are still outstanding.
+
+console = get_rich_console()
+
+
+async def _keyed(key, coroutine):
+    try:
+        return key, await coroutine
+    except Exception as e:
+        return key, e
+
+
+async def _stream(table, coroutines_by_key, add_rows, description, limit):
+    spinner = Spinner("dots", text=f"{description} ({len(coroutines_by_key)} outstanding)")
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _bounded(key, coroutine):
+        async with semaphore:
+            return await _keyed(key, coroutine)
+
+    results = {}
+    # the live view is cleared when done and the final table is printed once, so it is also recorded
+    with Live(Group(table, spinner), console=console, refresh_per_second=10, transient=True):
+        for next_result in asyncio.as_completed([_bounded(key, c) for key, c in coroutines_by_key.items()]):
+            key, result = await next_result
+            results[key] = result
+            add_rows(table, key, result)
+            outstanding = len(coroutines_by_key) - len(results)
+            spinner.update(text=f"{description} ({outstanding} outstanding)")
+    console.print(table)
+    return results
+
+
+def stream_rows(table, coroutines_by_key, add_rows, description="Waiting for AWS", limit=aio.MAX_CONCURRENCY):
+    """Awaits the coroutines concurrently and calls add_rows(table, key, result or exception) as each finishes.
+
+    The table is shown live while rows arrive. Returns {key: result or exception}.
+    """
+    if not coroutines_by_key:
+        console.print(table)
+        return {}
+    return aio.run(_stream(table, coroutines_by_key, add_rows, description, limit))
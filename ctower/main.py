@@ -7,8 +7,17 @@ from itertools import zip_longest
 from . import guardrail_identifiers
 from . import cli
 from . import utilities
+from . import aio
+from . import live
+from . import state
+from . import recording
+from . import multiorg
+from . import controlsets
+from . import compliance
+from . import metrics
 from rich.terminal_theme import MONOKAI
 import os
+import sys
 install(show_locals=True)
 from rich.console import Group
 
@@ -22,6 +31,52 @@ app = typer.Typer(no_args_is_help=True)
 app.add_typer(cli.apply_app, name="apply")
 app.add_typer(cli.remove_app, name="remove")
 app.add_typer(cli.ls_app, name="ls")
+app.add_typer(cli.ops_app, name="ops")
+app.add_typer(state.state_app, name="state")
+app.add_typer(multiorg.orgs_app, name="orgs")
+app.add_typer(controlsets.analyze_app, name="analyze")
+app.command("compliance")(compliance.check_compliance)
+app.add_typer(metrics.metrics_app, name="metrics")
+
+
+@app.callback()
+def _main_options(
+    ctx: typer.Context,
+    record_dir: str = typer.Option(
+        None,
+        "--record",
+        help="Directory to record every AWS API request and response to.",
+    ),
+    replay_dir: str = typer.Option(
+        None,
+        "--replay",
+        help="Directory to replay recorded AWS API responses from, instead of calling AWS.",
+    ),
+    replay_latency: bool = typer.Option(
+        False,
+        "--replay-latency",
+        help="Sleep for the originally recorded duration of each replayed call.",
+    ),
+    metrics_file: str = typer.Option(
+        None,
+        "--metrics-file",
+        help="File to write API call and control operation metrics of the command to, in Prometheus text format.",
+    ),
+):
+    """CLI application for managing AWS Control Tower for your AWS Organization."""
+    if record_dir and replay_dir:
+        utilities.print_error_panel("[blue]`--record`[/] and [blue]`--replay`[/] can not be used together.")
+        raise typer.Exit()
+    if record_dir:
+        recording.start_recording(record_dir)
+    if replay_dir:
+        if not os.path.exists(os.path.join(replay_dir, recording.RECORDING_FILE_NAME)):
+            utilities.print_error_panel(f"There is no recording in [blue]{replay_dir}[/].")
+            raise typer.Exit()
+        recording.start_replaying(replay_dir, simulate_latency=replay_latency)
+    if metrics_file:
+        metrics.start_collecting()
+        ctx.call_on_close(lambda: metrics.write_metrics_file(metrics_file, metrics.render(metrics.collect_tool_metrics())))
 
 
 def print_boto_region_and_profile():
@@ -86,12 +141,31 @@ def _sync_organizational_unit_controls(
 
 
 
-    from_ou_enabled_control_identifiers = utilities._list_enabled_controls(from_ou.get("Arn"))
-    to_ou_enabled_control_identifiers = utilities._list_enabled_controls(to_ou.get("Arn"))
+    def _add_enabled_control_count_row(table, ou, result):
+        count = f"{len(result)}" if not isinstance(result, Exception) else "[red]failed"
+        table.add_row(f"[bold]{ou.name}", count)
+
+    enabled_controls_table = Table(title="[bold]Enabled Controls", title_style="white on black")
+    enabled_controls_table.add_column("[bold]O.U.", justify="left", style="green")
+    enabled_controls_table.add_column("[bold]Count", justify="right")
+    enabled_controls_by_ou = live.stream_rows(
+        enabled_controls_table,
+        {ou: aio.list_enabled_controls(ou.arn) for ou in dict.fromkeys([from_ou, to_ou])},
+        _add_enabled_control_count_row,
+        description="Listing enabled controls",
+    )
+    for ou, result in enabled_controls_by_ou.items():
+        if isinstance(result, ct_client.exceptions.ResourceNotFoundException):
+            utilities.print_not_registered_error_panel(ou.arn)
+            raise typer.Exit()
+        if isinstance(result, Exception):
+            raise result
+    from_ou_enabled_controls = enabled_controls_by_ou[from_ou]
+    to_ou_enabled_controls = enabled_controls_by_ou[to_ou]
     
-    from_ou_enabled_control_ids = [utilities.get_control_id_from_control_identifier(c_identifier) for c_identifier in from_ou_enabled_control_identifiers]
-    to_ou_enabled_control_ids = [utilities.get_control_id_from_control_identifier(c_identifier) for c_identifier in to_ou_enabled_control_identifiers]
-    mandatory_control_ids = [_.get('id') for _ in guardrail_identifiers.MANDATORY_CONTROL_TOWER_GUARDRAILS]
+    from_ou_enabled_control_ids = [enabled_control.control_id for enabled_control in from_ou_enabled_controls]
+    to_ou_enabled_control_ids = [enabled_control.control_id for enabled_control in to_ou_enabled_controls]
+    mandatory_control_ids = [_.id for _ in utilities.get_guardrail_controls_by_category("mandatory")]
     # remove the mandatory controls, as the control tower api has no permission to enable/disable them
     only_on_from_ou = list(set(from_ou_enabled_control_ids) - set(to_ou_enabled_control_ids) - set(mandatory_control_ids))
     only_on_to_ou= list(set(to_ou_enabled_control_ids) - set(from_ou_enabled_control_ids) - set(mandatory_control_ids))
@@ -106,8 +180,8 @@ def _sync_organizational_unit_controls(
     # prompt
     # table = Table(title=f"Unique Controls on Organizational Units", title_style="",)
     table = Table()
-    table.add_column(f"Controls that are only on [blue]{from_ou.get('Name')}",justify="left",)
-    table.add_column(f"Controls that are only on [green]{to_ou.get('Name')}",justify="left",)
+    table.add_column(f"Controls that are only on [blue]{from_ou.name}",justify="left",)
+    table.add_column(f"Controls that are only on [green]{to_ou.name}",justify="left",)
     
     for from_, to_ in unique_controls_zip:
         str_from_ = f"[bold][blue]+ {from_}" if from_ else ''
@@ -125,7 +199,7 @@ def _sync_organizational_unit_controls(
 
         control_arn = guardrail_identifiers.generate_guardrail_arn(control_id, AWS_REGION_NAME)
         control_panel = Panel(
-            f"\n[bold]{control_dict.get('text')}\n",
+            f"\n[bold]{control_dict.text}\n",
             title=f"Selected Control: [blue][bold]{control_id}",
             title_align="left",
             subtitle=f"[cyan]{control_arn}[/]",
@@ -135,24 +209,27 @@ def _sync_organizational_unit_controls(
     
     if not only_on_from_ou:
         console.print(table)
-        utilities.print_error_panel(f"There are [bold][red]no GuardRail Controls to apply.[/][/] [blue]O.U. {from_ou.get('Name')}[/] has no unique Controls when compared to [green]O.U. {to_ou.get('Name')}[/]. No changes are made.")
+        utilities.print_error_panel(f"There are [bold][red]no GuardRail Controls to apply.[/][/] [blue]O.U. {from_ou.name}[/] has no unique Controls when compared to [green]O.U. {to_ou.name}[/]. No changes are made.")
         raise typer.Exit()
     
     
-    to_be_applied_panel_group = Group(table, f"", Panel(Group(*_to_apply_control_panels), title_align='left', title=f"[bold]Controls will be applied to [green]{to_ou.get('Name')}[/]"))
-    console.print(Panel(to_be_applied_panel_group, title=f"[bold]SYNC Controls Operation from [blue]{from_ou.get('Name')}[/] to [green]{to_ou.get('Name')}[/]"))
+    to_be_applied_panel_group = Group(table, f"", Panel(Group(*_to_apply_control_panels), title_align='left', title=f"[bold]Controls will be applied to [green]{to_ou.name}[/]"))
+    console.print(Panel(to_be_applied_panel_group, title=f"[bold]SYNC Controls Operation from [blue]{from_ou.name}[/] to [green]{to_ou.name}[/]"))
     
     
     do_apply = Confirm.ask(
-        f"\nAre you sure you want to [bold][green]add[/][/] [bold][blue]{len(only_on_from_ou)}[/][/] Controls to [bold][green]{to_ou.get('Name')}[/][/]",
+        f"\nAre you sure you want to [bold][green]add[/][/] [bold][blue]{len(only_on_from_ou)}[/][/] Controls to [bold][green]{to_ou.name}[/][/]",
         console=console,
         
     )
     if not do_apply:
         raise typer.Abort()
-    cli._apply_list_of_controls_to_organizational_unit(to_ou.get('Name'), only_on_from_ou)
+    cli._apply_list_of_controls_to_organizational_unit(to_ou.name, only_on_from_ou)
     
 def run_app():
+    if metrics.exports_to_stdout(sys.argv[1:]):
+        # keep the banner, status and errors off stdout, it is parsed as Prometheus text
+        console.stderr = True
     sanity_checks()
     console.print()
     console.print("kloia/ctower v.0.1", style="blue on white", justify="center")
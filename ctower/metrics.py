@@ -0,0 +1,364 @@
+import copy
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import typer
+
+from . import aio
+from . import catalog
+from . import history
+from . import recording
+from .utilities import (
+    get_boto_session,
+    get_rich_console,
+    print_error_panel,
+)
+
+# Prometheus text format exporter for guardrail coverage and ctower's own health.
+# API call latency, status codes and throttles are collected with botocore event handlers,
+# operation durations come from the local history and coverage is listed live from AWS.
+
+session = get_boto_session()
+console = get_rich_console()
+AWS_REGION_NAME = session.region_name
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_PORT = 9799
+DEFAULT_REFRESH_INTERVAL = 300
+API_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+OPERATION_DURATION_BUCKETS = (30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0)
+THROTTLING_ERROR_CODES = frozenset(
+    (
+        "Throttling",
+        "ThrottlingException",
+        "ThrottledException",
+        "TooManyRequestsException",
+        "RequestLimitExceeded",
+        "RequestThrottled",
+        "RequestThrottledException",
+        "SlowDown",
+    )
+)
+
+metrics_app = typer.Typer(no_args_is_help=True, help="Exports guardrail coverage and ctower metrics in Prometheus text format.")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_sample(name, labels, value):
+    label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels)
+    return f"{name}{{{label_text}}} {value!r}" if label_text else f"{name} {value!r}"
+
+
+class MetricFamily:
+    """A gauge or counter and its samples, keyed by label values."""
+
+    def __init__(self, name, metric_type, documentation):
+        self.name = name
+        self.metric_type = metric_type
+        self.documentation = documentation
+        self.samples = {}
+
+    def set(self, value, **labels):
+        self.samples[tuple(sorted(labels.items()))] = float(value)
+
+    def inc(self, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        self.samples[key] = self.samples.get(key, 0.0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(_format_sample(self.name, labels, value) for labels, value in sorted(self.samples.items()))
+        return lines
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label values."""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        bucket_counts, total = self.series.get(key, ([0] * len(self.buckets), [0.0, 0]))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                bucket_counts[index] += 1
+        total[0] += value
+        total[1] += 1
+        self.series[key] = (bucket_counts, total)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (bucket_counts, (value_sum, count)) in sorted(self.series.items()):
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append(_format_sample(f"{self.name}_bucket", labels + (("le", repr(bound)),), float(bucket_count)))
+            lines.append(_format_sample(f"{self.name}_bucket", labels + (("le", "+Inf"),), float(count)))
+            lines.append(_format_sample(f"{self.name}_sum", labels, float(value_sum)))
+            lines.append(_format_sample(f"{self.name}_count", labels, float(count)))
+        return lines
+
+
+def render(metric_families):
+    return "\n".join(line for family in metric_families for line in family.render()) + "\n"
+
+
+class ApiMetrics:
+    """Collects latency, status codes and throttles of every AWS API call made through the shared session."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram(
+            "ctower_api_call_duration_seconds", "AWS API call latency, retries included.", API_LATENCY_BUCKETS
+        )
+        self.calls = MetricFamily("ctower_api_calls_total", "counter", "AWS API calls by HTTP status code.")
+        self.throttles = MetricFamily("ctower_api_throttles_total", "counter", "Throttled AWS API call attempts.")
+
+    def _start_call(self, context, **kwargs):
+        context["ctower_metrics_started"] = time.perf_counter()
+
+    def _finish_call(self, http_response, parsed, model, context, **kwargs):
+        started = context.get("ctower_metrics_started")
+        labels = {"service": model.service_model.service_name, "operation": model.name}
+        with self._lock:
+            if started is not None:
+                self.latency.observe(time.perf_counter() - started, **labels)
+            self.calls.inc(status_code=str(http_response.status_code), **labels)
+
+    def _check_throttle(self, response, operation, **kwargs):
+        if response is None:
+            return None
+        error_code = response[1].get("Error", {}).get("Code")
+        if error_code in THROTTLING_ERROR_CODES:
+            with self._lock:
+                self.throttles.inc(service=operation.service_model.service_name, operation=operation.name)
+        return None
+
+    def handlers(self):
+        return [
+            ("before-parameter-build", self._start_call, "ctower-metrics-start-call"),
+            ("after-call", self._finish_call, "ctower-metrics-finish-call"),
+            ("needs-retry", self._check_throttle, "ctower-metrics-check-throttle"),
+        ]
+
+    def metric_families(self):
+        """A snapshot of the metric families, safe to render while calls are still being made."""
+        with self._lock:
+            return copy.deepcopy([self.latency, self.calls, self.throttles])
+
+
+api_metrics = ApiMetrics()
+_collecting = []
+
+
+def start_collecting():
+    """Starts collecting API metrics, on the shared session and every session created later on."""
+    if not _collecting:
+        recording.activate_handlers(api_metrics.handlers())
+        _collecting.append(api_metrics)
+
+
+def collect_operation_metrics():
+    """Control operation durations and results from the local operation history."""
+    durations = Histogram(
+        "ctower_control_operation_duration_seconds",
+        "Duration of finished control operations from the local history.",
+        OPERATION_DURATION_BUCKETS,
+    )
+    operations = MetricFamily(
+        "ctower_control_operations_total", "counter", "Finished control operations from the local history by status."
+    )
+    for row in history.finished_operations():
+        operations.inc(operation_type=row["operation_type"], status=row["status"])
+        if row["status"] == "SUCCEEDED" and row["duration"] is not None:
+            durations.observe(row["duration"], operation_type=row["operation_type"])
+    return [durations, operations]
+
+
+async def _list_coverage():
+    organizational_units = await aio.list_organizational_units()
+    return organizational_units, await aio.list_enabled_controls_for_organizational_units(organizational_units)
+
+
+def collect_coverage_metrics():
+    """Enabled controls per OU and category, and the OUs missing each strongly recommended control."""
+    started = time.perf_counter()
+    organizational_units, enabled_controls_by_ou = aio.run(_list_coverage())
+    enabled_controls = MetricFamily(
+        "ctower_enabled_controls", "gauge", "Enabled GuardRail Controls per Organizational Unit and category."
+    )
+    registered = MetricFamily(
+        "ctower_organizational_unit_registered", "gauge", "1 when the Organizational Unit's enabled controls could be listed."
+    )
+    missing = MetricFamily(
+        "ctower_organizational_units_missing_control",
+        "gauge",
+        "Registered Organizational Units without the strongly recommended control.",
+    )
+    controls_by_id = catalog.get_controls_by_id()
+    strongly_recommended_ids = [control.id for control in catalog.query(category="strongly-recommended")]
+    missing_counts = dict.fromkeys(strongly_recommended_ids, 0)
+    for ou in organizational_units:
+        result = enabled_controls_by_ou.get(ou.arn)
+        registered.set(0 if isinstance(result, Exception) else 1, organizational_unit=ou.name, organizational_unit_id=ou.id)
+        if isinstance(result, Exception):
+            continue
+        counts = dict.fromkeys(catalog.CATEGORIES, 0)
+        for enabled_control in result:
+            control = controls_by_id.get(enabled_control.control_id)
+            category = control.category if control else "other"
+            counts[category] = counts.get(category, 0) + 1
+        for category, count in counts.items():
+            enabled_controls.set(count, organizational_unit=ou.name, organizational_unit_id=ou.id, category=category)
+        enabled_control_ids = {enabled_control.control_id for enabled_control in result}
+        for control_id in strongly_recommended_ids:
+            if control_id not in enabled_control_ids:
+                missing_counts[control_id] += 1
+    for control_id, count in missing_counts.items():
+        missing.set(count, control_id=control_id)
+
+    collection = MetricFamily(
+        "ctower_coverage_collection_duration_seconds", "gauge", "Time taken to list coverage from AWS."
+    )
+    collection.set(time.perf_counter() - started, region=AWS_REGION_NAME)
+    last_success = MetricFamily(
+        "ctower_coverage_last_success_timestamp_seconds", "gauge", "Unix time of the last successful coverage collection."
+    )
+    last_success.set(time.time(), region=AWS_REGION_NAME)
+    return [enabled_controls, registered, missing, collection, last_success]
+
+
+def collect_tool_metrics():
+    return api_metrics.metric_families() + collect_operation_metrics()
+
+
+def write_metrics_file(path, text):
+    """Writes atomically, so textfile collectors never read a partial file."""
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w") as file:
+        file.write(text)
+    os.replace(temporary_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    exporter = None
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.exporter.text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsExporter:
+    """Refreshes coverage metrics in the background, tool metrics are rendered on every scrape."""
+
+    def __init__(self, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._coverage_families = []
+        self._refresh_errors = MetricFamily(
+            "ctower_coverage_collection_errors_total", "counter", "Failed coverage collections."
+        )
+        self._refresh_errors.inc(0)
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        try:
+            coverage_families = collect_coverage_metrics()
+        except Exception as e:
+            console.print(f"[red]Failed to collect coverage metrics: {e}")
+            with self._lock:
+                self._refresh_errors.inc()
+            return
+        with self._lock:
+            self._coverage_families = coverage_families
+
+    def _refresh_forever(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            self.refresh()
+
+    def text(self):
+        with self._lock:
+            metric_families = self._coverage_families + [self._refresh_errors]
+        return render(metric_families + collect_tool_metrics())
+
+    def serve(self, address, port):
+        self.refresh()
+        threading.Thread(target=self._refresh_forever, name="ctower-metrics-refresh", daemon=True).start()
+        handler = type("MetricsHandler", (_MetricsHandler,), {"exporter": self})
+        server = ThreadingHTTPServer((address, port), handler)
+        console.print(f"[bold]Serving metrics on [cyan]http://{address}:{port}/metrics[/], refreshing every {self.refresh_interval}s")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+def exports_to_stdout(args):
+    """Whether the command line args run `metrics export` without `--output`, so stdout must carry only metrics."""
+    for index in range(len(args) - 1):
+        if args[index:index + 2] == ["metrics", "export"]:
+            return not any(arg.startswith(("--output", "-o")) for arg in args[index + 2:])
+    return False
+
+
+@metrics_app.command("export")
+def _export_metrics(
+    output: str = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="File to write the metrics to, e.g. for node_exporter's textfile collector. Prints to stdout if not given.",
+    ),
+    with_coverage: bool = typer.Option(
+        True,
+        "--coverage/--no-coverage",
+        help="List enabled controls of every Organizational Unit for coverage metrics.",
+    ),
+):
+    """Collects the metrics once and writes them in Prometheus text format."""
+    start_collecting()
+    metric_families = []
+    if with_coverage:
+        with console.status("[bold]Collecting coverage metrics..."):
+            metric_families.extend(collect_coverage_metrics())
+    text = render(metric_families + collect_tool_metrics())
+    if output:
+        write_metrics_file(output, text)
+        console.print(f"[green]Metrics are written to [bold]{output}")
+    else:
+        typer.echo(text, nl=False)
+
+
+@metrics_app.command("serve")
+def _serve_metrics(
+    port: int = typer.Option(DEFAULT_PORT, "--port", "-p", help="Port to serve /metrics on."),
+    address: str = typer.Option("127.0.0.1", "--address", help="Address to bind to."),
+    refresh_interval: int = typer.Option(
+        DEFAULT_REFRESH_INTERVAL, "--interval", "-i", help="Seconds between coverage refreshes."
+    ),
+):
+    """Serves the metrics over HTTP, refreshing coverage periodically."""
+    if refresh_interval <= 0:
+        print_error_panel("[blue]`--interval`[/] must be a positive number of seconds.")
+        raise typer.Exit()
+    start_collecting()
+    MetricsExporter(refresh_interval=refresh_interval).serve(address, port)
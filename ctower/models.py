@@ -0,0 +1,163 @@
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+# Compact models for the boto3 response dicts ctower works with.
+# Identifiers are interned and ARNs are parsed once, so large sweeps share their strings.
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(frozen=True)
+class OrganizationalUnit:
+    __slots__ = ("id", "arn", "name", "parent_id")
+    id: str
+    arn: str
+    name: str
+    parent_id: Optional[str]
+
+    @classmethod
+    def from_dict(cls, ou_dict, parent_id=None):
+        """Creates from an Organizations `OrganizationalUnit` dict or a state file entry."""
+        return cls(
+            id=_intern(ou_dict.get("Id")),
+            arn=_intern(ou_dict.get("Arn")),
+            name=ou_dict.get("Name"),
+            parent_id=_intern(ou_dict.get("ParentId", parent_id)),
+        )
+
+    def to_dict(self):
+        return {"Id": self.id, "Arn": self.arn, "Name": self.name, "ParentId": self.parent_id}
+
+
+@dataclass(frozen=True)
+class Control:
+    __slots__ = ("id", "text", "category", "behavior", "regions")
+    id: str
+    text: str
+    category: str
+    behavior: str
+    # regions the control is available in, None when it is available wherever Control Tower is
+    regions: Optional[frozenset]
+
+    @classmethod
+    def from_dict(cls, control_dict, category=None):
+        """Creates from a control catalog entry."""
+        regions = control_dict.get("regions")
+        return cls(
+            id=_intern(control_dict.get("id")),
+            text=control_dict.get("text"),
+            category=_intern(category or control_dict.get("category")),
+            behavior=_intern(control_dict.get("behavior")),
+            regions=frozenset(regions) if regions is not None else None,
+        )
+
+    def to_dict(self):
+        return {"id": self.id, "text": self.text}
+
+
+@dataclass(frozen=True)
+class EnabledControl:
+    __slots__ = ("control_id", "arn")
+    control_id: str
+    arn: str
+
+    @property
+    def arn_prefix(self):
+        """The control ARN without the control id, e.g. `arn:aws:controltower:eu-west-1::control/`"""
+        return self.arn[: -len(self.control_id)]
+
+    @classmethod
+    def from_arn(cls, control_arn):
+        return _parse_enabled_control_arn(control_arn)
+
+
+@lru_cache(maxsize=None)
+def _parse_enabled_control_arn(control_arn):
+    _, control_id = control_arn.rsplit("/", 1)
+    return EnabledControl(control_id=_intern(control_id), arn=_intern(control_arn))
+
+
+@dataclass(frozen=True)
+class ControlOperation:
+    __slots__ = (
+        "operation_id",
+        "operation_type",
+        "status",
+        "status_message",
+        "start_time",
+        "end_time",
+        "control_arn",
+        "target_arn",
+    )
+    operation_id: str
+    operation_type: str
+    status: str
+    status_message: Optional[str]
+    start_time: Optional[datetime]
+    end_time: Optional[datetime]
+    control_arn: Optional[str]
+    target_arn: Optional[str]
+
+    @classmethod
+    def from_dict(cls, operation_dict, operation_id=None):
+        """Creates from a Control Tower `controlOperation` or `ControlOperationSummary` dict."""
+        return cls(
+            operation_id=operation_id or operation_dict.get("operationIdentifier"),
+            operation_type=_intern(operation_dict.get("operationType")),
+            status=_intern(operation_dict.get("status")),
+            status_message=operation_dict.get("statusMessage"),
+            start_time=operation_dict.get("startTime"),
+            end_time=operation_dict.get("endTime"),
+            control_arn=_intern(operation_dict.get("controlIdentifier")),
+            target_arn=_intern(operation_dict.get("targetIdentifier")),
+        )
+
+    @property
+    def is_finished(self):
+        return self.status in ("SUCCEEDED", "FAILED")
+
+
+@dataclass(frozen=True)
+class Account:
+    __slots__ = ("id", "arn", "name", "status", "parent_id")
+    id: str
+    arn: str
+    name: str
+    status: str
+    parent_id: Optional[str]
+
+    @classmethod
+    def from_dict(cls, account_dict, parent_id=None):
+        """Creates from an Organizations `Account` dict."""
+        return cls(
+            id=_intern(account_dict.get("Id")),
+            arn=_intern(account_dict.get("Arn")),
+            name=account_dict.get("Name"),
+            status=_intern(account_dict.get("Status")),
+            parent_id=_intern(parent_id),
+        )
+
+
+@dataclass(frozen=True)
+class ControlCompliance:
+    __slots__ = ("account_id", "control_id", "compliance_type", "non_compliant_resource_count")
+    account_id: str
+    control_id: str
+    compliance_type: str
+    non_compliant_resource_count: int
+
+    @classmethod
+    def from_dict(cls, compliance_dict, account_id, control_id):
+        """Creates from an AWS Config `ComplianceByConfigRule` dict."""
+        compliance = compliance_dict.get("Compliance", {})
+        return cls(
+            account_id=_intern(account_id),
+            control_id=_intern(control_id),
+            compliance_type=_intern(compliance.get("ComplianceType", "INSUFFICIENT_DATA")),
+            non_compliant_resource_count=compliance.get("ComplianceContributorCount", {}).get("CappedCount", 0),
+        )
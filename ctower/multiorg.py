@@ -0,0 +1,216 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+import boto3
+import botocore.session
+import typer
+from botocore.exceptions import ProfileNotFound
+from botocore.utils import JSONFileCache
+from rich.table import Table
+
+from . import aio
+from . import recording
+from .utilities import (
+    boto_client_config,
+    get_boto_session,
+    get_rich_console,
+    print_error_panel,
+)
+
+# Runs discovery and listing commands against several AWS Organizations (Control Tower landing zones)
+# at once. Every organization gets its own session and clients, all of them run on one event loop.
+
+session = get_boto_session()
+console = get_rich_console()
+AWS_REGION_NAME = session.region_name
+
+# same directory as the AWS CLI, so assumed role and SSO credentials are shared with it and across profiles
+CREDENTIAL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".aws", "cli", "cache")
+_CACHED_CREDENTIAL_PROVIDERS = ("assume-role", "assume-role-with-web-identity", "sso")
+
+orgs_app = typer.Typer(no_args_is_help=True, help="Lists Organizational Units and enabled controls across multiple AWS Organizations.")
+
+
+@dataclass(frozen=True)
+class OrganizationTarget:
+    __slots__ = ("name", "profile", "region")
+    name: str
+    profile: str
+    region: str
+
+
+def read_organizations_config(file_path):
+    """Reads targets from a JSON file: {"organizations": [{"name": ..., "profile": ..., "regions": [...]}]}"""
+    with open(file_path, "r") as file:
+        config = json.load(file)
+    targets = []
+    for organization in config.get("organizations", []):
+        profile = organization.get("profile")
+        regions = organization.get("regions") or [AWS_REGION_NAME]
+        for region in regions:
+            targets.append(OrganizationTarget(name=organization.get("name") or profile, profile=profile, region=region))
+    return targets
+
+
+def targets_from_profiles(profiles):
+    """Creates a target in the current region for each comma separated profile name."""
+    return [
+        OrganizationTarget(name=profile.strip(), profile=profile.strip(), region=AWS_REGION_NAME)
+        for profile in profiles.split(",")
+        if profile.strip()
+    ]
+
+
+@lru_cache(maxsize=None)
+def get_credential_cache():
+    return JSONFileCache(CREDENTIAL_CACHE_DIR)
+
+
+@lru_cache(maxsize=None)
+def _get_botocore_session(profile):
+    """One botocore session per profile, so credentials are resolved once and shared by every region."""
+    botocore_session = botocore.session.Session(profile=profile)
+    recording.register_active_handlers(botocore_session.get_component("event_emitter"))
+    credential_resolver = botocore_session.get_component("credential_provider")
+    for method in _CACHED_CREDENTIAL_PROVIDERS:
+        provider = credential_resolver.get_provider(method)
+        if provider is not None and hasattr(provider, "cache"):
+            provider.cache = get_credential_cache()
+    return botocore_session
+
+
+@lru_cache(maxsize=None)
+def get_target_clients(target):
+    """Returns the (organizations, controltower) clients of a target."""
+    target_session = boto3.session.Session(botocore_session=_get_botocore_session(target.profile), region_name=target.region)
+    return (
+        target_session.client("organizations", config=boto_client_config),
+        target_session.client("controltower", config=boto_client_config),
+    )
+
+
+def resolve_credentials(targets):
+    """Resolves credentials up front, one profile at a time, so MFA/SSO prompts never race in workers."""
+    missing_profiles = []
+    for profile in dict.fromkeys(target.profile for target in targets):
+        try:
+            credentials = _get_botocore_session(profile).get_credentials()
+        except ProfileNotFound:
+            credentials = None
+        if credentials is None:
+            missing_profiles.append(profile)
+    return missing_profiles
+
+
+async def _list_organization(target, with_enabled_controls):
+    organizations_client, ct_client = get_target_clients(target)
+    organizational_units = await aio.list_organizational_units(client=organizations_client)
+    enabled_controls = {}
+    if with_enabled_controls:
+        enabled_controls = await aio.list_enabled_controls_for_organizational_units(organizational_units, client=ct_client)
+    return organizational_units, enabled_controls
+
+
+async def list_organizations(targets, with_enabled_controls=False):
+    """Returns {target: (organizational_units, {ou_arn: enabled controls or exception}) or exception}."""
+    results = await asyncio.gather(
+        *(_list_organization(target, with_enabled_controls) for target in targets), return_exceptions=True
+    )
+    return dict(zip(targets, results))
+
+
+def _get_targets_or_exit(profiles, config_file):
+    if not profiles and not config_file:
+        print_error_panel("Please provide [blue]`--profiles`[/] or [blue]`--config`[/].")
+        raise typer.Exit()
+    targets = []
+    if profiles:
+        targets.extend(targets_from_profiles(profiles))
+    if config_file:
+        targets.extend(read_organizations_config(config_file))
+    missing_profiles = resolve_credentials(targets)
+    if missing_profiles:
+        print_error_panel(f"Could not find credentials for profiles: [blue]{', '.join(missing_profiles)}[/]")
+        raise typer.Exit()
+    return targets
+
+
+def _print_failed_organizations(results):
+    for target, result in results.items():
+        if isinstance(result, Exception):
+            print_error_panel(
+                f"[bold]Failed to list organization [blue]{target.name}[/] ([cyan]{target.profile}[/] / {target.region}).[/]\n\n[red]Exception:[/] {str(result)}"
+            )
+
+
+profiles_option = typer.Option(
+    None, "--profiles", "-p", help="Comma separated AWS CLI profiles, one per organization."
+)
+config_option = typer.Option(
+    None, "--config", "-c", help="Path to a JSON file listing organizations with their profile and regions."
+)
+
+
+@orgs_app.command("organizational-units")
+def _list_organizational_units_across_organizations(
+    profiles: str = profiles_option,
+    config_file: str = config_option,
+):
+    """Lists Organizational Units of every given organization."""
+    targets = _get_targets_or_exit(profiles, config_file)
+    with console.status(f"[bold]Listing [blue]{len(targets)}[/] organizations..."):
+        results = aio.run(list_organizations(targets))
+
+    table = Table(title=f"[bold]Organizational Units", title_style="black on white")
+    table.add_column("[bold]Organization", justify="left", style="magenta", no_wrap=True)
+    table.add_column("[bold]Region", justify="left", style="white", no_wrap=True)
+    table.add_column("[bold]Name", justify="left", style="green", no_wrap=True)
+    table.add_column("[bold]Identifier", justify="center", style="white", no_wrap=True)
+    table.add_column("[bold]ARN", justify="center", style="cyan", no_wrap=True)
+    for target, result in results.items():
+        if isinstance(result, Exception):
+            continue
+        organizational_units, _ = result
+        for ou in organizational_units:
+            table.add_row(f"[bold]{target.name}", target.region, f"[bold]{ou.name}", f"[bold]{ou.id}", f"{ou.arn}")
+    console.print(table)
+    _print_failed_organizations(results)
+
+
+@orgs_app.command("enabled-controls")
+def _list_enabled_controls_across_organizations(
+    profiles: str = profiles_option,
+    config_file: str = config_option,
+):
+    """Lists enabled controls for every Organizational Unit of every given organization."""
+    targets = _get_targets_or_exit(profiles, config_file)
+    with console.status(f"[bold]Listing enabled controls in [blue]{len(targets)}[/] organizations..."):
+        results = aio.run(list_organizations(targets, with_enabled_controls=True))
+
+    table = Table(title=f"[bold]Enabled GuardRail Controls", title_style="white on black")
+    table.add_column("[bold]Organization", justify="left", style="magenta", no_wrap=True)
+    table.add_column("[bold]Region", justify="left", style="white", no_wrap=True)
+    table.add_column("[bold]O.U.", justify="left", style="green", no_wrap=True)
+    table.add_column("[bold]Count", justify="right", style="white")
+    table.add_column("[bold]Enabled GuardRail Control Identifiers", justify="left", style="blue")
+    for target, result in results.items():
+        if isinstance(result, Exception):
+            continue
+        organizational_units, enabled_controls = result
+        for ou in organizational_units:
+            ou_enabled_controls = enabled_controls.get(ou.arn, [])
+            if isinstance(ou_enabled_controls, Exception):
+                table.add_row(f"[bold]{target.name}", target.region, f"[bold]{ou.name}", "-", f"[red]{ou_enabled_controls}")
+                continue
+            table.add_row(
+                f"[bold]{target.name}",
+                target.region,
+                f"[bold]{ou.name}",
+                f"{len(ou_enabled_controls)}",
+                "\n".join(sorted(ec.control_id for ec in ou_enabled_controls)),
+            )
+    console.print(table)
+    _print_failed_organizations(results)
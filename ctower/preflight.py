@@ -0,0 +1,159 @@
+import asyncio
+
+import botocore
+import typer
+
+from . import aio
+from . import catalog
+from .utilities import (
+    get_boto_session,
+    get_control_tower_client,
+    get_rich_console,
+    find_guardrail_control_by_id,
+    find_organizational_unit_by_id_or_name,
+    print_error_panel,
+)
+
+# Pre-flight validation for bulk control changes.
+# Every check runs before the first write, and all problems are reported at once.
+
+session = get_boto_session()
+console = get_rich_console()
+ct_client = get_control_tower_client()
+AWS_REGION_NAME = session.region_name
+
+
+def check_region(control_ids=()):
+    """Checks if Control Tower and every control are offered in the current region, using catalog data only."""
+    if AWS_REGION_NAME not in catalog.get_control_tower_regions():
+        return [f"AWS Control Tower is not available in region [bold]{AWS_REGION_NAME}[/]."]
+    return [
+        f"Control ID [blue][bold]{control_id}[/][/] is not available in region [bold]{AWS_REGION_NAME}[/]."
+        for control_id in catalog.unavailable_control_ids(control_ids, AWS_REGION_NAME)
+    ]
+
+
+def skip_unavailable_controls(control_ids, region=None):
+    """Drops catalog controls that are not available in the region (the current one by default), using catalog data only."""
+    region = region or AWS_REGION_NAME
+    skipped_control_ids = set(catalog.unavailable_control_ids(control_ids, region))
+    if skipped_control_ids:
+        console.print(
+            f"[yellow]Skipping [bold]{len(skipped_control_ids)}[/] Controls that are not available in [bold]{region}[/]: "
+            f"{', '.join(sorted(skipped_control_ids))}"
+        )
+    return [control_id for control_id in control_ids if control_id not in skipped_control_ids]
+
+
+def check_control_ids(control_ids):
+    return [
+        f"Control ID [blue][bold]{control_id}[/][/] is not found in the list. Try: [cyan]`ls controls all`[/] command"
+        for control_id in control_ids
+        if not find_guardrail_control_by_id(control_id)
+    ]
+
+
+async def _no_operations():
+    return []
+
+
+async def check_organizational_unit(organizational_unit, check_operations=True):
+    """Checks that the OU is registered with Control Tower and has no control operation in progress.
+
+    Returns (problems, ids of the controls enabled on the OU).
+    """
+    enabled_controls, in_progress_operations = await asyncio.gather(
+        aio.list_enabled_controls(organizational_unit.arn),
+        aio.list_control_operations(target_arns=[organizational_unit.arn], statuses=["IN_PROGRESS"])
+        if check_operations
+        else _no_operations(),
+        return_exceptions=True,
+    )
+    problems = []
+    if isinstance(enabled_controls, ct_client.exceptions.ResourceNotFoundException):
+        problems.append(
+            f"O.U. [green][bold]{organizational_unit.name}[/][/] is [bold]not registered[/] with AWS Control Tower in [bold]{AWS_REGION_NAME}[/]."
+        )
+    elif isinstance(enabled_controls, Exception):
+        problems.append(
+            f"Failed to list enabled controls on O.U. [green][bold]{organizational_unit.name}[/][/]: {enabled_controls}"
+        )
+
+    if isinstance(in_progress_operations, Exception):
+        # an unregistered OU also fails here, it is already reported above
+        if not problems:
+            problems.append(
+                f"Failed to list control operations on O.U. [green][bold]{organizational_unit.name}[/][/]: {in_progress_operations}"
+            )
+    elif in_progress_operations:
+        problems.append(
+            f"O.U. [green][bold]{organizational_unit.name}[/][/] has [bold]{len(in_progress_operations)}[/] control operation(s) in progress."
+        )
+    enabled_control_ids = frozenset()
+    if not isinstance(enabled_controls, Exception):
+        enabled_control_ids = frozenset(enabled_control.control_id for enabled_control in enabled_controls)
+    return problems, enabled_control_ids
+
+
+async def _check_organizational_units(organizational_units, check_operations=True):
+    results = await aio.gather_with_concurrency(
+        [check_organizational_unit(ou, check_operations=check_operations) for ou in organizational_units]
+    )
+    problems = []
+    enabled_control_ids_by_ou = {}
+    for organizational_unit, result in zip(organizational_units, results):
+        if isinstance(result, Exception):
+            problems.append(f"Failed to check O.U. [green][bold]{organizational_unit.name}[/][/]: {result}")
+            continue
+        ou_problems, enabled_control_ids_by_ou[organizational_unit.arn] = result
+        problems.extend(ou_problems)
+    return problems, enabled_control_ids_by_ou
+
+
+def run_preflight_checks(ou_names_or_ids, control_ids):
+    """Runs every pre-flight check.
+
+    Returns (problems, found organizational units, {ou_arn: ids of the controls already enabled on it}).
+    """
+    problems = check_region(control_ids) + check_control_ids(control_ids)
+
+    organizational_units = []
+    enabled_control_ids_by_ou = {}
+    for ou_name_or_id in ou_names_or_ids:
+        found_ou = find_organizational_unit_by_id_or_name(ou_name_or_id)
+        if not found_ou:
+            problems.append(
+                f"Organizational UNIT ID/NAME: [green][bold]{ou_name_or_id}[/][/] is not found. Try: [cyan]`ls organizational-units`[/] command"
+            )
+            continue
+        if found_ou not in organizational_units:
+            organizational_units.append(found_ou)
+
+    if organizational_units:
+        check_operations = aio.supports_list_control_operations()
+        if not check_operations:
+            console.print(
+                f"[yellow][bold]Warning:[/] botocore {botocore.__version__} does not support ListControlOperations, "
+                "control operations already in progress on the O.U.s are [bold]not checked[/]. Upgrade boto3 to enable this check."
+            )
+        with console.status(f"[bold]Running pre-flight checks on [blue]{len(organizational_units)}[/] Organizational Units..."):
+            ou_problems, enabled_control_ids_by_ou = aio.run(
+                _check_organizational_units(organizational_units, check_operations=check_operations)
+            )
+        problems.extend(ou_problems)
+    return problems, organizational_units, enabled_control_ids_by_ou
+
+
+def run_preflight_checks_or_exit(ou_names_or_ids, control_ids):
+    """Runs every pre-flight check, prints all problems and exits if there are any.
+
+    Returns (found organizational units, {ou_arn: ids of the controls already enabled on it}).
+    """
+    problems, organizational_units, enabled_control_ids_by_ou = run_preflight_checks(ou_names_or_ids, control_ids)
+    if problems:
+        problem_lines = "\n".join(f"- {problem}" for problem in problems)
+        print_error_panel(
+            f"[bold]Pre-flight checks failed with [red]{len(problems)}[/] problem(s). No changes are made.[/]\n\n{problem_lines}"
+        )
+        raise typer.Exit()
+    return organizational_units, enabled_control_ids_by_ou
@@ -0,0 +1,112 @@
+import heapq
+import threading
+import time
+
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, ProgressColumn, SpinnerColumn, TextColumn
+from rich.text import Text
+
+from . import history
+from .utilities import MAX_MUTATION_CONCURRENCY, get_rich_console
+
+console = get_rich_console()
+
+
+def estimate_remaining_seconds(running_remaining, queued_durations, concurrency):
+    """Seconds until every operation is expected to finish, with at most `concurrency` of them running at once.
+
+    `running_remaining` are the seconds left on the operations already running, `queued_durations` the expected
+    durations of the ones waiting for a slot, in submission order. Each queued operation takes the first free slot.
+    """
+    slots = list(running_remaining)
+    slots.extend([0.0] * max(max(concurrency, 1) - len(slots), 0))
+    heapq.heapify(slots)
+    finish = max(slots)
+    for duration in queued_durations:
+        slot_finish = heapq.heappop(slots) + duration
+        heapq.heappush(slots, slot_finish)
+        finish = max(finish, slot_finish)
+    return finish
+
+
+class _EtaColumn(ProgressColumn):
+    def __init__(self, tracker):
+        super().__init__()
+        self.tracker = tracker
+
+    def render(self, task):
+        seconds = int(self.tracker.eta())
+        return Text(f"ETA {seconds // 60}:{seconds % 60:02d}", style="cyan")
+
+
+class _ThroughputColumn(ProgressColumn):
+    def __init__(self, tracker):
+        super().__init__()
+        self.tracker = tracker
+
+    def render(self, task):
+        return Text(f"{self.tracker.operations_per_minute():.1f} ops/min", style="magenta")
+
+
+class ControlOperationsProgress:
+    """Live progress display for control operations, with an ETA based on the operation history.
+
+    `targets` is a list of (key, control_id, operation_type); call `submitted(key)` when the operation
+    is submitted and `finished(key)` when it reaches a terminal state. `concurrency` is the number of
+    operations running at once, the others are expected to start as slots free up.
+    """
+
+    def __init__(self, description, targets, concurrency=MAX_MUTATION_CONCURRENCY):
+        self._expected_durations = {
+            key: history.expected_duration(control_id, operation_type) for key, control_id, operation_type in targets
+        }
+        self._submitted_at = {}
+        self._concurrency = concurrency
+        self._finished_count = 0
+        self._started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.progress = Progress(
+            SpinnerColumn(),
+            TextColumn("[bold]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            _EtaColumn(self),
+            _ThroughputColumn(self),
+            console=console,
+        )
+        self.task_id = self.progress.add_task(description, total=len(targets))
+
+    def __enter__(self):
+        self.progress.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.progress.stop()
+
+    def submitted(self, key):
+        with self._lock:
+            self._submitted_at[key] = time.monotonic()
+
+    def finished(self, key):
+        with self._lock:
+            self._expected_durations.pop(key, None)
+            self._submitted_at.pop(key, None)
+            self._finished_count += 1
+        self.progress.advance(self.task_id)
+
+    def eta(self):
+        """Seconds until the last unfinished operation is expected to finish, queued operations wait for a free slot."""
+        now = time.monotonic()
+        with self._lock:
+            running_remaining = [
+                max(self._submitted_at[key] + expected - now, 0.0)
+                for key, expected in self._expected_durations.items()
+                if key in self._submitted_at
+            ]
+            queued_durations = [
+                expected for key, expected in self._expected_durations.items() if key not in self._submitted_at
+            ]
+        return estimate_remaining_seconds(running_remaining, queued_durations, self._concurrency)
+
+    def operations_per_minute(self):
+        elapsed_minutes = (time.monotonic() - self._started_at) / 60
+        return self._finished_count / elapsed_minutes if elapsed_minutes > 0 else 0.0
@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+
+from . import aio
+from . import history
+from .utilities import get_boto_session, get_control_tower_client
+
+# Records botocore calls made through the shared session to disk and serves them back.
+# Parameters are captured before they are built into a request and replayed responses are returned
+# before the request is signed and sent, so a replay needs neither network access nor credentials.
+
+session = get_boto_session()
+ct_client = get_control_tower_client()
+
+RECORDING_FILE_NAME = "calls.jsonl"
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"__bytes__": value.decode("latin-1")}
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if "__datetime__" in value:
+            return datetime.fromisoformat(value["__datetime__"])
+        if "__bytes__" in value:
+            return value["__bytes__"].encode("latin-1")
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def _call_key(service_name, operation_name, params, region=None):
+    return f"{region}/{service_name}.{operation_name}:{json.dumps(_encode(params), sort_keys=True)}"
+
+
+def _service_name(model):
+    return model.service_model.service_name
+
+
+def _capture_params(params, model, context, **kwargs):
+    context["ctower_params"] = dict(params)
+    context["ctower_started"] = time.perf_counter()
+
+
+class _ReplayedHttpResponse:
+    """Minimal stand-in for botocore's AWSResponse, botocore only reads the status code."""
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+        self.content = b""
+
+
+class Recorder:
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, RECORDING_FILE_NAME)
+        self._file = open(self.path, "a")
+        self._lock = threading.Lock()
+
+    def _record_call(self, http_response, parsed, model, context, **kwargs):
+        started = context.get("ctower_started")
+        parsed = dict(parsed)
+        parsed.pop("ResponseMetadata", None)
+        entry = {
+            "service": _service_name(model),
+            "operation": model.name,
+            "region": context.get("client_region"),
+            "params": _encode(context.get("ctower_params", {})),
+            "status_code": http_response.status_code,
+            "response": _encode(parsed),
+            "elapsed": time.perf_counter() - started if started else 0.0,
+        }
+        with self._lock:
+            self._file.write(json.dumps(entry, default=str) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class Replayer:
+    def __init__(self, directory, simulate_latency=False):
+        self.path = os.path.join(directory, RECORDING_FILE_NAME)
+        self.simulate_latency = simulate_latency
+        self._calls = defaultdict(deque)
+        self._lock = threading.Lock()
+        with open(self.path, "r") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                key = _call_key(entry["service"], entry["operation"], _decode(entry["params"]), entry.get("region"))
+                self._calls[key].append(entry)
+
+    def _replay_call(self, model, params, context, **kwargs):
+        params = context.get("ctower_params", {})
+        key = _call_key(_service_name(model), model.name, params, context.get("client_region"))
+        with self._lock:
+            # recordings without a region match calls from any region
+            recorded_calls = self._calls.get(key) or self._calls.get(_call_key(_service_name(model), model.name, params))
+            if not recorded_calls:
+                raise LookupError(f"No recorded response for {key}")
+            # repeated calls (e.g. operation polling) are served in recorded order, the last one sticks
+            entry = recorded_calls.popleft() if len(recorded_calls) > 1 else recorded_calls[0]
+        if self.simulate_latency:
+            time.sleep(entry.get("elapsed", 0.0))
+        parsed = _decode(entry["response"])
+        parsed["ResponseMetadata"] = {"HTTPStatusCode": entry["status_code"], "RetryAttempts": 0}
+        return _ReplayedHttpResponse(entry["status_code"]), parsed
+
+
+# (event name, handler, unique id) of the active recorder/replayer and metrics, applied to sessions created later on
+_active_handlers = []
+
+
+def register_active_handlers(events):
+    """Registers the active recording/replaying handlers on another session's or client's event emitter."""
+    for event_name, handler, unique_id in _active_handlers:
+        events.register(event_name, handler, unique_id=unique_id)
+
+
+def activate_handlers(handlers):
+    """Registers (event name, handler, unique id) handlers on the shared session, its clients and later sessions."""
+    _active_handlers.extend(handlers)
+    # clients copy the session's event emitter on creation, so already created clients need their own handlers
+    for events in (session.events, ct_client.meta.events):
+        register_active_handlers(events)
+
+
+def start_recording(directory):
+    recorder = Recorder(directory)
+    activate_handlers(
+        [
+            ("before-parameter-build", _capture_params, "ctower-capture-params"),
+            ("after-call", recorder._record_call, "ctower-record-call"),
+        ]
+    )
+    return recorder
+
+
+def start_replaying(directory, simulate_latency=False):
+    replayer = Replayer(directory, simulate_latency=simulate_latency)
+    history.disable_writes()
+    if not simulate_latency:
+        aio.disable_poll_sleep()
+    activate_handlers(
+        [
+            ("before-parameter-build", _capture_params, "ctower-capture-params"),
+            ("before-call", replayer._replay_call, "ctower-replay-call"),
+        ]
+    )
+    return replayer
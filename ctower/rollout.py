@@ -0,0 +1,176 @@
+import asyncio
+
+import typer
+from rich.table import Table
+
+from . import aio
+from . import guardrail_identifiers
+from .progress import ControlOperationsProgress
+from .utilities import (
+    get_boto_session,
+    get_rich_console,
+    print_error_panel,
+    print_success_panel,
+)
+
+# Wave based rollout of control changes: every wave is applied concurrently and has to reach a terminal
+# state before the next one starts. The rollout halts when a wave's failure rate passes the threshold.
+
+session = get_boto_session()
+console = get_rich_console()
+AWS_REGION_NAME = session.region_name
+
+DEFAULT_FAILURE_THRESHOLD = 0.0
+# seconds to wait for a single control operation before it is counted as failed. A timed out operation may
+# still be running and count against Control Tower's operation limit, so nothing more is submitted after it.
+DEFAULT_OPERATION_TIMEOUT = 1800
+
+
+class OperationNotSubmitted(Exception):
+    pass
+
+
+def read_waves_from_file(file_path):
+    """Reads rollout waves, one wave per line with comma separated OU IDs or names. `#` starts a comment."""
+    waves = []
+    with open(file_path, "r") as file:
+        for line in file.read().splitlines():
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            waves.append([ou.strip() for ou in line.split(",") if ou.strip()])
+    return waves
+
+
+async def _enable_and_wait(control_id, organizational_unit, poll_interval, timeout, timed_out, operations_progress=None):
+    control_arn = guardrail_identifiers.generate_guardrail_arn(control_id, AWS_REGION_NAME)
+    try:
+        if timed_out.is_set():
+            raise OperationNotSubmitted("Not submitted, an earlier operation of the wave timed out and may still be running")
+        operation_id = await aio.enable_control(control_arn, organizational_unit.arn)
+        if operations_progress:
+            operations_progress.submitted((organizational_unit.arn, control_id))
+        try:
+            return await aio.wait_for_control_operation(operation_id, poll_interval=poll_interval, timeout=timeout)
+        except aio.ControlOperationTimeout:
+            timed_out.set()
+            raise
+    finally:
+        if operations_progress:
+            operations_progress.finished((organizational_unit.arn, control_id))
+
+
+def wave_targets(organizational_units, control_ids, enabled_control_ids_by_ou=None):
+    """(organizational_unit, control_id) pairs of a wave, without the controls already enabled on the OU."""
+    enabled_control_ids_by_ou = enabled_control_ids_by_ou or {}
+    return [
+        (ou, control_id)
+        for ou in organizational_units
+        for control_id in control_ids
+        if control_id not in enabled_control_ids_by_ou.get(ou.arn, ())
+    ]
+
+
+def wave_progress_targets(targets):
+    """Targets of a wave for `progress.ControlOperationsProgress`."""
+    return [((ou.arn, control_id), control_id, "ENABLE_CONTROL") for ou, control_id in targets]
+
+
+def print_already_enabled(organizational_units, control_ids, targets):
+    already_enabled_count = len(organizational_units) * len(control_ids) - len(targets)
+    if already_enabled_count:
+        console.print(f"[yellow]Skipping [bold]{already_enabled_count}[/] Controls that are already enabled on their O.U.")
+
+
+async def run_wave(targets, poll_interval=aio.DEFAULT_POLL_INTERVAL, timeout=DEFAULT_OPERATION_TIMEOUT, operations_progress=None):
+    """Enables the controls of the wave's (organizational_unit, control_id) targets concurrently and waits for all of them.
+
+    At most `aio.MAX_MUTATION_CONCURRENCY` control operations are in flight at once. Once an operation times out,
+    the targets not submitted yet fail with OperationNotSubmitted.
+
+    Returns a list of (organizational_unit, control_id, ControlOperation or exception).
+    """
+    timed_out = asyncio.Event()
+    results = await aio.gather_with_concurrency(
+        [
+            _enable_and_wait(control_id, ou, poll_interval, timeout, timed_out, operations_progress)
+            for ou, control_id in targets
+        ],
+        limit=aio.MAX_MUTATION_CONCURRENCY,
+    )
+    return [(ou, control_id, result) for (ou, control_id), result in zip(targets, results)]
+
+
+def is_failed_result(result):
+    return isinstance(result, Exception) or result.status != "SUCCEEDED"
+
+
+def _print_wave_results(wave_number, wave_results):
+    table = Table(title=f"[bold]Wave {wave_number} Results", title_style="black on white")
+    table.add_column("[bold]O.U.", justify="left", style="green", no_wrap=True)
+    table.add_column("[bold]Control", justify="left", style="blue", no_wrap=True)
+    table.add_column("[bold]Status", justify="left")
+    for ou, control_id, result in wave_results:
+        if isinstance(result, aio.ControlOperationTimeout):
+            status = f"[yellow]TIMED OUT[/] {result}"
+        elif isinstance(result, Exception):
+            status = f"[red]FAILED[/] {result}"
+        elif result.status == "SUCCEEDED":
+            status = f"[green]{result.status}"
+        else:
+            status = f"[red]{result.status}[/] {result.status_message or ''}"
+        table.add_row(f"[bold]{ou.name}", control_id, status)
+    console.print(table)
+
+
+def run_rollout(
+    waves,
+    control_ids,
+    failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+    poll_interval=aio.DEFAULT_POLL_INTERVAL,
+    timeout=DEFAULT_OPERATION_TIMEOUT,
+    enabled_control_ids_by_ou=None,
+):
+    """Runs the waves in order, halts when a wave's failure rate is above failure_threshold or an operation timed out.
+
+    `waves` is a list of lists of OrganizationalUnit, controls already enabled on an OU are skipped.
+    Returns the results of every finished wave.
+    """
+    all_results = []
+    for wave_number, organizational_units in enumerate(waves, start=1):
+        targets = wave_targets(organizational_units, control_ids, enabled_control_ids_by_ou)
+        print_already_enabled(organizational_units, control_ids, targets)
+        if not targets:
+            print_success_panel(f"Wave [bold]{wave_number}/{len(waves)}[/] has no Controls left to enable.")
+            continue
+        with ControlOperationsProgress(f"Wave {wave_number}/{len(waves)}", wave_progress_targets(targets)) as operations_progress:
+            wave_results = aio.run(
+                run_wave(
+                    targets,
+                    poll_interval=poll_interval,
+                    timeout=timeout,
+                    operations_progress=operations_progress,
+                )
+            )
+        all_results.extend(wave_results)
+        _print_wave_results(wave_number, wave_results)
+
+        failed_count = sum(1 for _, _, result in wave_results if is_failed_result(result))
+        failure_rate = failed_count / len(wave_results) if wave_results else 0.0
+        timed_out_count = sum(1 for _, _, result in wave_results if isinstance(result, aio.ControlOperationTimeout))
+        if timed_out_count:
+            print_error_panel(
+                f"[bold]Halting rollout at wave {wave_number}/{len(waves)}.[/] [red]{timed_out_count}[/] operations timed out and may "
+                "still be running on AWS Control Tower. Remaining waves are not applied. Try: [cyan]`ops history`[/] command"
+            )
+            raise typer.Exit(code=1)
+        if failure_rate > failure_threshold:
+            print_error_panel(
+                f"[bold]Halting rollout at wave {wave_number}/{len(waves)}.[/] [red]{failed_count}/{len(wave_results)}[/] operations failed "
+                f"({failure_rate:.0%}), the failure threshold is {failure_threshold:.0%}. Remaining waves are not applied."
+            )
+            raise typer.Exit(code=1)
+        print_success_panel(
+            f"Wave [bold]{wave_number}/{len(waves)}[/] finished, [green]{len(wave_results) - failed_count}/{len(wave_results)}[/] operations succeeded."
+        )
+    return all_results
@@ -0,0 +1,345 @@
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+import typer
+from rich.table import Table
+
+from . import aio
+from .utilities import (
+    get_boto_session,
+    get_control_tower_client,
+    get_rich_console,
+    get_organizational_units,
+    print_error_panel,
+    print_success_panel,
+)
+
+# Local cache of the OU tree and enabled controls, patched incrementally from CloudTrail logs.
+# https://docs.aws.amazon.com/awscloudtrail/latest/userguide/cloudtrail-log-file-examples.html
+
+session = get_boto_session()
+console = get_rich_console()
+ct_client = get_control_tower_client()
+AWS_REGION_NAME = session.region_name
+
+STATE_FILE_PATH = os.environ.get(
+    "CTOWER_STATE_FILE", os.path.join(os.path.expanduser("~"), ".ctower", "state.json")
+)
+CLOUDTRAIL_LOG_SUFFIXES = (".json", ".json.gz")
+# <account>_CloudTrail_<region>_<YYYYMMDDTHHmmZ>_<unique>.json.gz
+CLOUDTRAIL_FILE_TIMESTAMP_PATTERN = re.compile(r"_CloudTrail_[^_]+_(\d{8}T\d{4}Z)_")
+
+state_app = typer.Typer(no_args_is_help=True, help="Manages the local Organizational Unit and enabled controls state.")
+
+
+def _utcnow_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _empty_state():
+    return {
+        "region": AWS_REGION_NAME,
+        "baseline_at": None,
+        "updated_at": None,
+        "last_event_time": None,
+        "organizational_units": {},
+        "enabled_controls": {},
+        "pending_operations": {},
+        "processed_files": [],
+    }
+
+
+def load_state(path=STATE_FILE_PATH):
+    """Loads the state file, returns False if there is no baseline for the current region."""
+    if not os.path.exists(path):
+        return False
+    with open(path, "r") as file:
+        state = json.load(file)
+    if state.get("region") != AWS_REGION_NAME:
+        return False
+    return state
+
+
+def save_state(state, path=STATE_FILE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    state["updated_at"] = _utcnow_iso()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(state, file, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def build_baseline_state():
+    """Full sweep: lists every Organizational Unit and its enabled controls concurrently.
+
+    Returns the state and {ou: exception} of the OUs whose enabled controls could not be listed, those are left
+    out of `enabled_controls`. Unregistered OUs can not have enabled controls, they are saved with none.
+    """
+    state = _empty_state()
+    organizational_units = get_organizational_units()
+    results = aio.run(aio.list_enabled_controls_for_organizational_units(organizational_units))
+    failed = {}
+    for ou in organizational_units:
+        state["organizational_units"][ou.id] = ou.to_dict()
+        result = results[ou.arn]
+        if isinstance(result, ct_client.exceptions.ResourceNotFoundException):
+            result = []
+        if isinstance(result, Exception):
+            failed[ou] = result
+            continue
+        state["enabled_controls"][ou.arn] = [ec.arn for ec in result]
+    state["baseline_at"] = _utcnow_iso()
+    return state, failed
+
+
+def iter_cloudtrail_log_files(log_dir, processed_files=()):
+    """Yields (relative_path, absolute_path) of unprocessed CloudTrail log files, oldest first.
+
+    File names start with the account and region, so files are ordered by the timestamp embedded after them.
+    """
+    processed_files = set(processed_files)
+    found = []
+    for dir_path, _, file_names in os.walk(log_dir):
+        for file_name in file_names:
+            if not file_name.endswith(CLOUDTRAIL_LOG_SUFFIXES):
+                continue
+            abs_path = os.path.join(dir_path, file_name)
+            rel_path = os.path.relpath(abs_path, log_dir)
+            if rel_path not in processed_files:
+                found.append((cloudtrail_file_timestamp(file_name), file_name, rel_path, abs_path))
+    for _, _, rel_path, abs_path in sorted(found):
+        yield rel_path, abs_path
+
+
+def cloudtrail_file_timestamp(file_name):
+    """The delivery timestamp of a CloudTrail log file name, empty if the name does not follow the format."""
+    match = CLOUDTRAIL_FILE_TIMESTAMP_PATTERN.search(file_name)
+    return match.group(1) if match else ""
+
+
+def iter_cloudtrail_records(file_path):
+    """Yields the records of a single CloudTrail log file in event time order."""
+    opener = gzip.open if file_path.endswith(".gz") else open
+    with opener(file_path, "rt") as file:
+        records = json.load(file).get("Records", [])
+    yield from sorted(records, key=lambda record: record.get("eventTime", ""))
+
+
+def apply_cloudtrail_record(state, record):
+    """Patches the state with a single CloudTrail record, returns True if the state has changed."""
+    if record.get("errorCode"):
+        # failed API calls do not change anything
+        return False
+
+    event_source = record.get("eventSource")
+    event_name = record.get("eventName")
+    request_parameters = record.get("requestParameters") or {}
+    response_elements = record.get("responseElements") or {}
+    organizational_units = state["organizational_units"]
+    enabled_controls = state["enabled_controls"]
+
+    if event_source == "controltower.amazonaws.com":
+        # enabled controls are regional, Organizations events are global
+        if record.get("awsRegion") != state.get("region"):
+            return False
+        control_arn = request_parameters.get("controlIdentifier")
+        target_arn = request_parameters.get("targetIdentifier")
+        if not control_arn or not target_arn:
+            return False
+        if event_name not in ("EnableControl", "DisableControl"):
+            return False
+        operation_id = response_elements.get("operationIdentifier")
+        if operation_id:
+            # the event is logged on submission, the change is applied once the operation is confirmed
+            state.setdefault("pending_operations", {})[operation_id] = {
+                "eventName": event_name,
+                "controlIdentifier": control_arn,
+                "targetIdentifier": target_arn,
+                "eventTime": record.get("eventTime"),
+            }
+            return True
+        return _apply_control_change(state, event_name, control_arn, target_arn)
+
+    if event_source != "organizations.amazonaws.com":
+        return False
+
+    if event_name == "CreateOrganizationalUnit":
+        created_ou = response_elements.get("organizationalUnit") or {}
+        if not created_ou.get("id"):
+            return False
+        organizational_units[created_ou.get("id")] = {
+            "Id": created_ou.get("id"),
+            "Arn": created_ou.get("arn"),
+            "Name": created_ou.get("name"),
+            "ParentId": request_parameters.get("parentId"),
+        }
+        enabled_controls.setdefault(created_ou.get("arn"), [])
+        return True
+    if event_name == "UpdateOrganizationalUnit":
+        ou = organizational_units.get(request_parameters.get("organizationalUnitId"))
+        if not ou or not request_parameters.get("name"):
+            return False
+        ou["Name"] = request_parameters.get("name")
+        return True
+    if event_name == "DeleteOrganizationalUnit":
+        ou = organizational_units.pop(request_parameters.get("organizationalUnitId"), None)
+        if not ou:
+            return False
+        enabled_controls.pop(ou.get("Arn"), None)
+        return True
+    return False
+
+
+def _apply_control_change(state, event_name, control_arn, target_arn):
+    target_controls = state["enabled_controls"].setdefault(target_arn, [])
+    if event_name == "EnableControl" and control_arn not in target_controls:
+        target_controls.append(control_arn)
+        return True
+    if event_name == "DisableControl" and control_arn in target_controls:
+        target_controls.remove(control_arn)
+        return True
+    return False
+
+
+def apply_operation_statuses(state, statuses_by_operation_id):
+    """Applies pending control changes whose operation succeeded and drops the failed ones.
+
+    Operations that are still in progress, or whose status is unknown, stay pending.
+    Returns the number of changes applied to the enabled controls.
+    """
+    pending_operations = state.setdefault("pending_operations", {})
+    applied_count = 0
+    for operation_id, status in statuses_by_operation_id.items():
+        pending_operation = pending_operations.get(operation_id)
+        if not pending_operation or status not in ("SUCCEEDED", "FAILED"):
+            continue
+        del pending_operations[operation_id]
+        if status == "SUCCEEDED" and _apply_control_change(
+            state,
+            pending_operation["eventName"],
+            pending_operation["controlIdentifier"],
+            pending_operation["targetIdentifier"],
+        ):
+            applied_count += 1
+    return applied_count
+
+
+async def _get_operation_statuses(operation_ids):
+    results = await aio.gather_with_concurrency([aio.get_control_operation(operation_id) for operation_id in operation_ids])
+    return {
+        operation_id: result.status
+        for operation_id, result in zip(operation_ids, results)
+        if not isinstance(result, Exception)
+    }
+
+
+def confirm_pending_operations(state):
+    """Looks up the pending control operations and applies the finished ones, returns the number of applied changes."""
+    # pending operations are confirmed in event order, so an enable followed by a disable ends up disabled
+    operation_ids = sorted(
+        state.get("pending_operations", {}),
+        key=lambda operation_id: state["pending_operations"][operation_id].get("eventTime") or "",
+    )
+    if not operation_ids:
+        return 0
+    statuses_by_operation_id = aio.run(_get_operation_statuses(operation_ids))
+    return apply_operation_statuses(state, {operation_id: statuses_by_operation_id.get(operation_id) for operation_id in operation_ids})
+
+
+def ingest_cloudtrail_logs(state, log_dir):
+    """Applies every unprocessed CloudTrail log file under log_dir to the state.
+
+    Returns the number of processed files and the number of records that changed the state.
+    """
+    processed_file_count = 0
+    applied_record_count = 0
+    for rel_path, abs_path in iter_cloudtrail_log_files(log_dir, state["processed_files"]):
+        for record in iter_cloudtrail_records(abs_path):
+            if apply_cloudtrail_record(state, record):
+                applied_record_count += 1
+            event_time = record.get("eventTime")
+            if event_time and event_time > (state.get("last_event_time") or ""):
+                state["last_event_time"] = event_time
+        state["processed_files"].append(rel_path)
+        processed_file_count += 1
+    return processed_file_count, applied_record_count
+
+
+@state_app.command("baseline")
+def _create_baseline_state():
+    """Sweeps every Organizational Unit and saves their enabled controls as the baseline state."""
+    with console.status("[bold]Listing enabled controls for every Organizational Unit..."):
+        state, failed = build_baseline_state()
+    save_state(state)
+    print_success_panel(
+        f"Saved baseline of [bold][blue]{len(state['organizational_units'])}[/][/] Organizational Units to [cyan]{STATE_FILE_PATH}[/]"
+    )
+    for ou, error in failed.items():
+        console.print(
+            f"[yellow]Enabled controls of O.U. [bold]{ou.name}[/] could not be listed and are not in the baseline: {error}"
+        )
+
+
+@state_app.command("ingest")
+def _ingest_cloudtrail_logs(
+    log_dir: str = typer.Option(
+        ...,
+        "--log-dir",
+        "-d",
+        help="Directory containing CloudTrail log files (.json or .json.gz), searched recursively.",
+    ),
+):
+    """Incrementally updates the local state from CloudTrail log files."""
+    state = load_state()
+    if not state:
+        print_error_panel(
+            f"There is no baseline state for [bold]{AWS_REGION_NAME}[/]. Try: [cyan]`state baseline`[/] command"
+        )
+        raise typer.Exit()
+    if not os.path.isdir(log_dir):
+        print_error_panel(f"Given log directory [blue]{log_dir}[/] does not exist.")
+        raise typer.Exit()
+
+    processed_file_count, applied_record_count = ingest_cloudtrail_logs(state, log_dir)
+    with console.status("[bold]Confirming pending control operations..."):
+        confirmed_count = confirm_pending_operations(state)
+    save_state(state)
+    print_success_panel(
+        f"Processed [bold][blue]{processed_file_count}[/][/] log files, [bold][green]{applied_record_count}[/][/] events changed the state, "
+        f"[bold][green]{confirmed_count}[/][/] control operations are confirmed and [bold][yellow]{len(state.get('pending_operations', {}))}[/][/] are still pending."
+    )
+
+
+@state_app.command("show")
+def _show_state():
+    """Shows the Organizational Units and enabled control counts in the local state."""
+    state = load_state()
+    if not state:
+        print_error_panel(
+            f"There is no baseline state for [bold]{AWS_REGION_NAME}[/]. Try: [cyan]`state baseline`[/] command"
+        )
+        raise typer.Exit()
+
+    pending_operations = state.get("pending_operations", {})
+    pending_counts = {}
+    for pending_operation in pending_operations.values():
+        pending_counts[pending_operation["targetIdentifier"]] = pending_counts.get(pending_operation["targetIdentifier"], 0) + 1
+    table = Table(
+        title=f"[bold]Local State[/] (last event: [cyan]{state.get('last_event_time')}[/])",
+        title_style="black on white",
+    )
+    table.add_column("[bold]Name", justify="left", style="green", no_wrap=True)
+    table.add_column("[bold]Identifier", justify="center", style="white", no_wrap=True)
+    table.add_column("[bold]Enabled Controls", justify="right", style="cyan")
+    table.add_column("[bold]Unconfirmed Changes", justify="right", style="yellow")
+    for ou in state["organizational_units"].values():
+        enabled_count = len(state["enabled_controls"].get(ou.get("Arn"), []))
+        table.add_row(f"[bold]{ou.get('Name')}", f"[bold]{ou.get('Id')}", f"{enabled_count}", f"{pending_counts.get(ou.get('Arn'), 0)}")
+    console.print(table)
+    if pending_operations:
+        console.print(
+            f"[yellow][bold]{len(pending_operations)}[/] control operations are not confirmed yet and are not counted. Try: [cyan]`state ingest`[/] command"
+        )
@@ -7,11 +7,13 @@ from rich.traceback import install
 from functools import lru_cache
 from rich.prompt import Confirm
 import boto3
+from botocore.config import Config
 from typing import Optional
 import typer
 import json
 from termcolor import colored
-from . import guardrail_identifiers
+from . import catalog
+from .models import OrganizationalUnit, EnabledControl, ControlOperation
 
 
 def _create_boto_session():
@@ -26,9 +28,16 @@ def _create_boto_session():
     return session
 
 
+# shared clients are thread-safe, size their connection pools for concurrent calls
+MAX_CONCURRENCY = int(os.environ.get("CTOWER_MAX_CONCURRENCY", 32))
+boto_client_config = Config(max_pool_connections=MAX_CONCURRENCY)
+# Control Tower runs a limited number of control operations at once, more are rejected,
+# so enabling/disabling controls (and waiting for them) is capped separately from read calls
+MAX_MUTATION_CONCURRENCY = int(os.environ.get("CTOWER_MAX_MUTATION_CONCURRENCY", 10))
+
 session = _create_boto_session()
 console = Console(record=True)
-ct_client = session.client("controltower")
+ct_client = session.client("controltower", config=boto_client_config)
 
 
 def get_boto_session():
@@ -43,15 +52,20 @@ def get_control_tower_client():
     return ct_client
 
 
+@lru_cache(maxsize=None)
+def get_organizations_client():
+    return session.client("organizations", config=boto_client_config)
+
+
 def list_roots():
-    client = session.client("organizations")
+    client = get_organizations_client()
     response = call_boto3_function(client, "list_roots")
     # print(json.dumps(response, indent=2, default=str))
     return response.get("Roots", False)
 
 
 def list_accounts():
-    client = session.client("organizations")
+    client = get_organizations_client()
     response = call_boto3_function(client, "list_accounts")
     # print(json.dumps(response, indent=2, default=str))
     return response.get("Accounts", False)
@@ -76,14 +90,14 @@ def call_boto3_function(client, function_name, kwargs=None):
 
 
 def get_current_organization():
-    client = session.client("organizations")
+    client = get_organizations_client()
     response = call_boto3_function(client, "describe_organization")
     # print(json.dumps(response, indent=2, default=str))
     return response.get("Organization", False)
 
 @lru_cache(maxsize=None)
 def get_organizational_units():
-    client = session.client("organizations")
+    client = get_organizations_client()
     root_ids = list_root_ids()
     if not root_ids:
         raise typer.Exit("Failed to get Root ID for the Organization")
@@ -95,12 +109,11 @@ def get_organizational_units():
         )
         ous = response.get("OrganizationalUnits", False)
         if ous:
-            organizational_units.extend(ous)
+            organizational_units.extend(OrganizationalUnit.from_dict(ou, parent_id=root_id) for ou in ous)
     return organizational_units
 
 def get_control_id_from_control_identifier(control_identifier):
-    prev_arn, control_id = control_identifier.rsplit("/", 1)
-    return control_id
+    return EnabledControl.from_arn(control_identifier).control_id
 
 def _list_enabled_controls(organizational_unit_arn):
     try:
@@ -110,33 +123,47 @@ def _list_enabled_controls(organizational_unit_arn):
             kwargs={"targetIdentifier": organizational_unit_arn},
         )
         enabled_controls = response.get("enabledControls", [])
-        enabled_control_identifiers = [ec.get("controlIdentifier") for ec in enabled_controls]
-        return enabled_control_identifiers
+        return [EnabledControl.from_arn(ec.get("controlIdentifier")) for ec in enabled_controls]
     except ct_client.exceptions.ResourceNotFoundException as e:
-        console.print(
-            Panel(
-                f"[red][bold]Failed to list enabled guardrail controls[/][/] on Organizational Unit: [blue]{organizational_unit_arn}[/].\n[yellow]This Organizational Unit [bold]is not registered[/] with AWS Control Tower.\n[white]Maybe you set the wrong [bold]AWS_REGION[/] environment variable?",
-                title="[red][bold]ERROR",
-                title_align="center",
-                expand=True,
-            )
-        )
+        print_not_registered_error_panel(organizational_unit_arn)
         raise typer.Exit()
 
 
+def print_not_registered_error_panel(organizational_unit_arn):
+    panel = Panel(
+        f"[red][bold]Failed to list enabled guardrail controls[/][/] on Organizational Unit: [blue]{organizational_unit_arn}[/].\n[yellow]This Organizational Unit [bold]is not registered[/] with AWS Control Tower.\n[white]Maybe you set the wrong [bold]AWS_REGION[/] environment variable?",
+        title="[red][bold]ERROR",
+        title_align="center",
+        expand=True,
+    )
+    console.print(panel)
+    return panel
+
+
+@lru_cache(maxsize=None)
+def _get_organizational_units_index():
+    index = {}
+    for o_u in get_organizational_units():
+        index.setdefault(o_u.id, o_u)
+        index.setdefault(o_u.name, o_u)
+    return index
+
+
 def find_organizational_unit_by_id_or_name(id_or_name: str):
-    organizational_units = get_organizational_units()
-    for o_u in organizational_units:
-        if o_u.get("Id") == id_or_name or o_u.get("Name") == id_or_name:
-            return o_u
-    return False
+    return _get_organizational_units_index().get(id_or_name, False)
+
+
+def get_guardrail_controls():
+    """Returns every known GuardRail Control, keyed by control id."""
+    return catalog.get_controls_by_id()
+
+
+def get_guardrail_controls_by_category(category):
+    return catalog.query(category=category)
 
 
 def find_guardrail_control_by_id(control_id):
-    for gr_control in guardrail_identifiers.ALL_GUARDRAILS:
-        if gr_control.get("id") == control_id:
-            return gr_control
-    return False
+    return catalog.find_control(control_id)
 
 def _get_control_operation(operation_identifier):
     try:
@@ -148,7 +175,10 @@ def _get_control_operation(operation_identifier):
             f"[bold]Failed to query Control Operation with ID: [blue]{operation_identifier}[/]"
         )
         raise typer.Exit()
-    return response.get("controlOperation", False)
+    operation_dict = response.get("controlOperation", False)
+    if not operation_dict:
+        return False
+    return ControlOperation.from_dict(operation_dict, operation_id=operation_identifier)
 
 
 def print_error_panel(text):
@@ -162,6 +192,17 @@ def print_error_panel(text):
     return panel
 
 
+def print_warning_panel(text):
+    panel = Panel(
+        text,
+        title="[yellow][bold]WARNING",
+        title_align="left",
+        expand=True,
+    )
+    console.print(panel)
+    return panel
+
+
 def print_success_panel(text):
     panel = Panel(
         text,
@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# ctower creates its boto3 session and clients on import, they only need a region and fake credentials
+os.environ.setdefault("AWS_REGION", "eu-west-1")
+os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.pop("AWS_PROFILE", None)
+_test_home = tempfile.mkdtemp(prefix="ctower-tests-")
+os.environ["CTOWER_HISTORY_DB"] = os.path.join(_test_home, "history.db")
+os.environ["CTOWER_STATE_FILE"] = os.path.join(_test_home, "state.json")
@@ -0,0 +1,44 @@
+import pytest
+
+from ctower import catalog
+from ctower import cli
+
+
+def test_query_filters_by_category_behavior_and_text():
+    controls = catalog.query(category="elective", behavior="detective")
+    assert controls
+    assert all(control.category == "elective" and control.behavior == "detective" for control in controls)
+    ssh = catalog.query(text="restricted_ssh")
+    assert [control.id for control in ssh] == ["AWS-GR_RESTRICTED_SSH"]
+
+
+def test_parse_filters_rejects_unknown_keys_and_empty_values():
+    assert catalog.parse_filters(["Category=elective", "behavior= detective"]) == {
+        "category": "elective",
+        "behavior": "detective",
+    }
+    assert catalog.parse_filters(["region=EU-WEST-1"]) == {"region": "eu-west-1"}
+    for expression in ("account=1", "category", "text=", "behavior=detectiv", "category=recommended", "region=eu-west-9"):
+        with pytest.raises(ValueError):
+            catalog.parse_filters([expression])
+
+
+def test_region_availability():
+    emr = catalog.find_control("AWS-GR_EMR_MASTER_NO_PUBLIC_IP")
+    ssh = catalog.find_control("AWS-GR_RESTRICTED_SSH")
+    assert ssh.regions is None and emr.regions
+    assert catalog.is_available_in_region(ssh, "il-central-1")
+    assert catalog.is_available_in_region(emr, "eu-west-1")
+    assert not catalog.is_available_in_region(emr, "il-central-1")
+    assert not catalog.is_available_in_region(ssh, "eu-west-9")
+    assert emr not in catalog.query(region="il-central-1")
+    assert catalog.unavailable_control_ids(
+        ["AWS-GR_RESTRICTED_SSH", "AWS-GR_EMR_MASTER_NO_PUBLIC_IP", "AWS-GR_UNKNOWN"], "il-central-1"
+    ) == ["AWS-GR_EMR_MASTER_NO_PUBLIC_IP"]
+
+
+def test_category_commands_intersect_with_the_category_filter(monkeypatch):
+    monkeypatch.setattr(cli, "_controls_filter", {"category": "elective"})
+    assert cli._query_guardrails() == catalog.query(category="elective")
+    assert cli._query_guardrails("elective") == catalog.query(category="elective")
+    assert cli._query_guardrails("strongly-recommended") == []
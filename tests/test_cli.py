@@ -0,0 +1,44 @@
+from ctower import aio
+from ctower import cli
+from ctower.models import OrganizationalUnit
+
+SANDBOX = OrganizationalUnit(id="ou-1", arn="arn:ou-1", name="Sandbox", parent_id="r-1")
+
+
+class _ControlTowerClient:
+    def __init__(self):
+        self.calls = []
+
+    def enable_control(self, **kwargs):
+        self.calls.append(("enable_control", kwargs))
+        return {"operationIdentifier": "op-1"}
+
+
+def _stub_submission(monkeypatch, wait_for_control_operation):
+    client = _ControlTowerClient()
+    monkeypatch.setattr(cli, "ct_client", client)
+    monkeypatch.setattr(cli, "find_organizational_unit_by_id_or_name", lambda ou_name_or_id: SANDBOX)
+    monkeypatch.setattr(aio, "record_submitted_operation", lambda *args, **kwargs: None)
+    monkeypatch.setattr(aio, "wait_for_control_operation", wait_for_control_operation)
+    return client
+
+
+def test_timed_out_single_operation_is_reported_in_progress(monkeypatch, capsys):
+    async def wait_for_control_operation(operation_id, timeout=None, **kwargs):
+        raise aio.ControlOperationTimeout(f"Control operation {operation_id} is still IN_PROGRESS")
+
+    client = _stub_submission(monkeypatch, wait_for_control_operation)
+    assert not cli._apply_control_to_organizational_unit("Sandbox", "AWS-GR_RESTRICTED_SSH", ask_for_prompt=False)
+    output = capsys.readouterr().out
+    assert len(client.calls) == 1
+    assert "still in progress" in output and "op-1" in output
+    assert "Failed to apply" not in output
+
+
+def test_no_wait_returns_once_submitted(monkeypatch, capsys):
+    async def wait_for_control_operation(operation_id, timeout=None, **kwargs):
+        raise AssertionError("--no-wait must not poll the operation")
+
+    _stub_submission(monkeypatch, wait_for_control_operation)
+    assert cli._apply_control_to_organizational_unit("Sandbox", "AWS-GR_RESTRICTED_SSH", ask_for_prompt=False, wait=False)
+    assert "op-1" in capsys.readouterr().out
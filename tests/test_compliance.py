@@ -0,0 +1,89 @@
+import threading
+
+from ctower import aio
+from ctower import compliance
+from ctower.models import Account, ControlCompliance, OrganizationalUnit
+
+OU = OrganizationalUnit(id="ou-1", arn="arn:ou-1", name="Sandbox", parent_id="r-1")
+
+
+def _account(number):
+    return Account(id=f"11111111111{number}", arn=f"arn:{number}", name=f"account-{number}", status="ACTIVE", parent_id="ou-1")
+
+
+def _compliance(account, control_id, compliance_type, resources=0):
+    return ControlCompliance(
+        account_id=account.id,
+        control_id=control_id,
+        compliance_type=compliance_type,
+        non_compliant_resource_count=resources,
+    )
+
+
+def test_control_id_from_config_rule_name():
+    control_ids = {"AWS-GR_RESTRICTED_SSH"}
+    assert compliance.control_id_from_config_rule_name("AWSControlTower_AWS-GR_RESTRICTED_SSH", control_ids) == "AWS-GR_RESTRICTED_SSH"
+    assert compliance.control_id_from_config_rule_name("AWSControlTower_AWS-GR_UNKNOWN", control_ids) is None
+    assert compliance.control_id_from_config_rule_name("custom-rule", control_ids) is None
+
+
+def test_aggregates_count_accounts_controls_and_failures():
+    first, second, third = _account(1), _account(2), _account(3)
+    results = {
+        (OU, first): [_compliance(first, "A", "COMPLIANT"), _compliance(first, "B", "NON_COMPLIANT", 3)],
+        (OU, second): [_compliance(second, "A", "COMPLIANT")],
+        (OU, third): RuntimeError("AccessDenied"),
+    }
+    by_ou = compliance.aggregate_by_organizational_unit(results)[OU]
+    assert by_ou["accounts"] == 3
+    assert by_ou["compliant_accounts"] == 1
+    assert by_ou["non_compliant_accounts"] == 1
+    assert by_ou["failed_accounts"] == 1
+    assert by_ou["non_compliant_controls"] == 1
+
+    by_control = compliance.aggregate_by_control(results)
+    assert list(by_control) == ["B", "A"]
+    assert by_control["A"]["counts"]["COMPLIANT"] == 2
+    assert by_control["B"]["counts"]["non_compliant_resources"] == 3
+    assert by_control["B"]["non_compliant_accounts"] == [first]
+
+
+class _FakeSession:
+    def __init__(self):
+        self.client_threads = []
+
+    def client(self, service_name, **kwargs):
+        self.client_threads.append(threading.get_ident())
+        return object()
+
+    def get_credentials(self):
+        self.client_threads.append(threading.get_ident())
+        return None
+
+
+class _FakeFetcher:
+    def __init__(self, **kwargs):
+        kwargs["client_creator"]("sts")
+
+    def fetch_credentials(self):
+        return {"access_key": "x", "secret_key": "y", "token": "z"}
+
+
+def test_account_config_clients_are_created_on_the_event_loop_thread(monkeypatch):
+    fake_session = _FakeSession()
+    monkeypatch.setattr(compliance, "session", fake_session)
+    monkeypatch.setattr(compliance, "AssumeRoleCredentialFetcher", _FakeFetcher)
+    monkeypatch.setattr(compliance, "_config_clients", {})
+    compliance.get_sts_client.cache_clear()
+
+    async def get_clients():
+        return threading.get_ident(), [
+            await compliance.get_account_config_client(account.id) for account in (_account(1), _account(1), _account(2))
+        ]
+
+    try:
+        loop_thread, clients = aio.run(get_clients())
+    finally:
+        compliance.get_sts_client.cache_clear()
+    assert clients[0] is clients[1] and clients[0] is not clients[2]
+    assert fake_session.client_threads and set(fake_session.client_threads) == {loop_thread}
@@ -0,0 +1,48 @@
+from ctower import controlsets
+from ctower.models import OrganizationalUnit
+
+
+def _ou(number, name=None):
+    return OrganizationalUnit(id=f"ou-{number}", arn=f"arn:ou-{number}", name=name or f"OU {number}", parent_id="r-1")
+
+
+def test_index_encode_decode_and_unknown_ids():
+    index = controlsets.ControlSetIndex(["A", "B", "C"])
+    bits = index.encode(["C", "A"])
+    assert bits == 0b101
+    assert index.decode(bits) == ["A", "C"]
+    assert index.encode(["D"]) == 1 << 3
+    assert index.control_ids == ["A", "B", "C", "D"]
+
+
+def test_popcount_and_jaccard_similarity():
+    assert controlsets.popcount(0b1011) == 3
+    assert controlsets.jaccard_similarity(0, 0) == 1.0
+    assert controlsets.jaccard_similarity(0b11, 0b01) == 0.5
+    assert controlsets.jaccard_similarity(0b10, 0b01) == 0.0
+
+
+def test_group_identical_and_common_core():
+    bits_by_ou = {_ou(1): 0b11, _ou(2): 0b11, _ou(3): 0b01}
+    assert controlsets.group_identical(bits_by_ou) == [(0b11, [_ou(1), _ou(2)]), (0b01, [_ou(3)])]
+    assert controlsets.common_core(bits_by_ou) == 0b01
+    assert controlsets.common_core({}) == 0
+
+
+def test_rank_by_similarity():
+    ranked = controlsets.rank_by_similarity(0b111, {_ou(1): 0b001, _ou(2): 0b1011})
+    assert [(ou, missing, extra) for ou, _, missing, extra in ranked] == [(_ou(2), 0b100, 0b1000), (_ou(1), 0b110, 0)]
+    assert ranked[0][1] == 0.5
+
+
+def test_cluster():
+    bits_by_ou = {_ou(1): 0b1111, _ou(2): 0b0111, _ou(3): 0b110000, _ou(4): 0b1111}
+    clusters = controlsets.cluster(bits_by_ou, threshold=0.7)
+    assert [ous for _, ous in clusters] == [[_ou(1), _ou(4), _ou(2)], [_ou(3)]]
+
+
+def test_find_organizational_unit_prefers_id():
+    bits_by_ou = {_ou(1, name="ou-2"): 0, _ou(2, name="Prod"): 0}
+    assert controlsets.find_organizational_unit(bits_by_ou, "ou-2") == _ou(2, name="Prod")
+    assert controlsets.find_organizational_unit(bits_by_ou, "Prod") == _ou(2, name="Prod")
+    assert controlsets.find_organizational_unit(bits_by_ou, "Missing") is None
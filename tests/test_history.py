@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from ctower import history
+from ctower.models import ControlOperation
+
+
+@pytest.fixture(autouse=True)
+def empty_history():
+    history._execute("DELETE FROM control_operations")
+    yield
+    history._writes_enabled[0] = True
+
+
+def _finish(operation_id, status, start, end):
+    history.record_finished(
+        ControlOperation.from_dict(
+            {
+                "status": status,
+                "startTime": datetime.fromtimestamp(start, timezone.utc),
+                "endTime": datetime.fromtimestamp(end, timezone.utc),
+            },
+            operation_id=operation_id,
+        )
+    )
+
+
+def _submit(operation_id, control_id, operation_type="ENABLE_CONTROL"):
+    history.record_submitted(operation_id, control_id, "arn:ou-1", operation_type, region="eu-west-1", submitted_at=1000.0)
+
+
+def test_expected_duration_falls_back_to_other_controls_then_default():
+    assert history.expected_duration("AWS-GR_A", "ENABLE_CONTROL") == history.DEFAULT_EXPECTED_DURATION
+    _submit("op-1", "AWS-GR_A")
+    _finish("op-1", "SUCCEEDED", 2000.0, 2060.0)
+    _submit("op-2", "AWS-GR_A")
+    _finish("op-2", "SUCCEEDED", 2000.0, 2180.0)
+    _submit("op-3", "AWS-GR_A")
+    _finish("op-3", "FAILED", 2000.0, 9000.0)
+    assert history.expected_duration("AWS-GR_A", "ENABLE_CONTROL") == pytest.approx(120.0)
+    assert history.expected_duration("AWS-GR_B", "ENABLE_CONTROL") == pytest.approx(120.0)
+    assert history.expected_duration("AWS-GR_A", "DISABLE_CONTROL") == history.DEFAULT_EXPECTED_DURATION
+
+
+def test_slowest_controls_and_recent_operations():
+    _submit("op-1", "AWS-GR_A")
+    _finish("op-1", "SUCCEEDED", 0.0, 30.0)
+    _submit("op-2", "AWS-GR_B")
+    _finish("op-2", "SUCCEEDED", 0.0, 300.0)
+    _submit("op-3", "AWS-GR_B")
+    _finish("op-3", "FAILED", 0.0, 10.0)
+    slowest = history.slowest_controls()
+    assert [(row["control_id"], row["operation_count"], row["failed_count"]) for row in slowest] == [
+        ("AWS-GR_B", 2, 1),
+        ("AWS-GR_A", 1, 0),
+    ]
+    assert slowest[0]["max_duration"] == pytest.approx(300.0)
+    assert [row["operation_id"] for row in history.recent_operations(control_id="AWS-GR_A")] == ["op-1"]
+    assert len(history.finished_operations()) == 3
+
+
+def test_in_progress_operations_and_disabled_writes():
+    _submit("op-1", "AWS-GR_A")
+    _submit("op-2", "AWS-GR_A")
+    _finish("op-2", "SUCCEEDED", 0.0, 10.0)
+    assert history.in_progress_operation_ids(region="eu-west-1") == ["op-1"]
+    assert history.in_progress_operation_ids(region="us-east-1") == []
+
+    history.disable_writes()
+    _submit("op-3", "AWS-GR_A")
+    _finish("op-1", "SUCCEEDED", 0.0, 10.0)
+    assert history.in_progress_operation_ids() == ["op-1"]
+    assert history.recent_operations(control_id="AWS-GR_A", limit=10)[-1]["operation_id"] != "op-3"
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+from ctower import metrics
+
+
+def test_metric_family_renders_sorted_escaped_samples():
+    family = metrics.MetricFamily("ctower_test", "gauge", "A test gauge.")
+    family.set(2, organizational_unit='Prod "eu"\nwest')
+    family.inc(organizational_unit="Dev")
+    family.inc(2, organizational_unit="Dev")
+    assert metrics.render([family]) == (
+        "# HELP ctower_test A test gauge.\n"
+        "# TYPE ctower_test gauge\n"
+        'ctower_test{organizational_unit="Dev"} 3.0\n'
+        'ctower_test{organizational_unit="Prod \\"eu\\"\\nwest"} 2.0\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("ctower_test_seconds", "A test histogram.", (1.0, 5.0))
+    for value in (0.5, 2.0, 10.0):
+        histogram.observe(value, operation="EnableControl")
+    lines = histogram.render()
+    assert lines[2:] == [
+        'ctower_test_seconds_bucket{operation="EnableControl",le="1.0"} 1.0',
+        'ctower_test_seconds_bucket{operation="EnableControl",le="5.0"} 2.0',
+        'ctower_test_seconds_bucket{operation="EnableControl",le="+Inf"} 3.0',
+        'ctower_test_seconds_sum{operation="EnableControl"} 12.5',
+        'ctower_test_seconds_count{operation="EnableControl"} 3.0',
+    ]
+
+
+def test_api_metrics_count_calls_and_throttles():
+    api_metrics = metrics.ApiMetrics()
+    operation = SimpleNamespace(name="ListEnabledControls", service_model=SimpleNamespace(service_name="controltower"))
+    context = {}
+    api_metrics._start_call(context=context)
+    api_metrics._finish_call(http_response=SimpleNamespace(status_code=200), parsed={}, model=operation, context=context)
+    api_metrics._check_throttle(response=(None, {"Error": {"Code": "ThrottlingException"}}), operation=operation)
+    api_metrics._check_throttle(response=(None, {"Error": {"Code": "AccessDenied"}}), operation=operation)
+    api_metrics._check_throttle(response=None, operation=operation)
+    latency, calls, throttles = api_metrics.metric_families()
+    labels = (("operation", "ListEnabledControls"), ("service", "controltower"))
+    assert calls.samples == {labels + (("status_code", "200"),): 1.0}
+    assert throttles.samples == {labels: 1.0}
+    assert latency.series[labels][1][1] == 1
+
+
+def test_exports_to_stdout():
+    assert metrics.exports_to_stdout(["metrics", "export"])
+    assert metrics.exports_to_stdout(["--replay", "rec", "metrics", "export", "--no-coverage"])
+    assert not metrics.exports_to_stdout(["metrics", "export", "-o", "ctower.prom"])
+    assert not metrics.exports_to_stdout(["metrics", "export", "--output=ctower.prom"])
+    assert not metrics.exports_to_stdout(["metrics", "serve"])
+    assert not metrics.exports_to_stdout(["ls", "controls", "all"])
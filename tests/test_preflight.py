@@ -0,0 +1,71 @@
+import pytest
+import typer
+
+from ctower import aio
+from ctower import cli
+from ctower import preflight
+from ctower.models import EnabledControl, OrganizationalUnit
+
+SANDBOX = OrganizationalUnit(id="ou-1", arn="arn:ou-1", name="Sandbox", parent_id="r-1")
+LEGACY = OrganizationalUnit(id="ou-2", arn="arn:ou-2", name="Legacy", parent_id="r-1")
+CONTROL_ARN = "arn:aws:controltower:eu-west-1::control/AWS-GR_RESTRICTED_SSH"
+
+
+def _not_registered():
+    return preflight.ct_client.exceptions.ResourceNotFoundException(
+        {"Error": {"Code": "ResourceNotFoundException", "Message": "not registered"}}, "ListEnabledControls"
+    )
+
+
+def test_all_problems_are_reported_together_before_any_write(monkeypatch):
+    organizational_units = {ou.name: ou for ou in (SANDBOX, LEGACY)}
+
+    async def list_enabled_controls(organizational_unit_arn, client=None):
+        if organizational_unit_arn == LEGACY.arn:
+            raise _not_registered()
+        return [EnabledControl.from_arn(CONTROL_ARN)]
+
+    async def list_control_operations(target_arns=None, statuses=None, client=None):
+        return []
+
+    async def enable_control(*args, **kwargs):
+        raise AssertionError("pre-flight checks must not write")
+
+    monkeypatch.setattr(preflight, "find_organizational_unit_by_id_or_name", organizational_units.get)
+    monkeypatch.setattr(aio, "supports_list_control_operations", lambda client=None: True)
+    monkeypatch.setattr(aio, "list_enabled_controls", list_enabled_controls)
+    monkeypatch.setattr(aio, "list_control_operations", list_control_operations)
+    monkeypatch.setattr(aio, "enable_control", enable_control)
+
+    problems, found, enabled_control_ids_by_ou = preflight.run_preflight_checks(
+        ["Sandbox", "Legacy", "Missing"], ["AWS-GR_RESTRICTED_SSH", "AWS-GR_UNKNOWN"]
+    )
+    assert len(problems) == 3
+    assert "AWS-GR_UNKNOWN" in problems[0]
+    assert any("Missing" in problem and "not found" in problem for problem in problems)
+    assert any("Legacy" in problem and "not registered" in problem for problem in problems)
+    assert found == [SANDBOX, LEGACY]
+    assert enabled_control_ids_by_ou[SANDBOX.arn] == {"AWS-GR_RESTRICTED_SSH"}
+
+
+def test_controls_unavailable_in_the_region_are_skipped_and_reported(monkeypatch):
+    monkeypatch.setattr(preflight, "AWS_REGION_NAME", "il-central-1")
+    control_ids = ["AWS-GR_RESTRICTED_SSH", "AWS-GR_EMR_MASTER_NO_PUBLIC_IP"]
+    assert preflight.skip_unavailable_controls(control_ids) == ["AWS-GR_RESTRICTED_SSH"]
+    assert preflight.skip_unavailable_controls(control_ids, region="eu-west-1") == control_ids
+    problems = preflight.check_region(control_ids)
+    assert len(problems) == 1 and "AWS-GR_EMR_MASTER_NO_PUBLIC_IP" in problems[0]
+
+
+def test_bulk_apply_skips_controls_unavailable_in_the_region(monkeypatch):
+    checked = []
+
+    def run_preflight_checks_or_exit(ou_names_or_ids, control_ids):
+        checked.append(control_ids)
+        raise typer.Exit()
+
+    monkeypatch.setattr(preflight, "AWS_REGION_NAME", "il-central-1")
+    monkeypatch.setattr(preflight, "run_preflight_checks_or_exit", run_preflight_checks_or_exit)
+    with pytest.raises(typer.Exit):
+        cli._apply_list_of_controls_to_organizational_unit("Sandbox", ["AWS-GR_RESTRICTED_SSH", "AWS-GR_EMR_MASTER_NO_PUBLIC_IP"])
+    assert checked == [["AWS-GR_RESTRICTED_SSH"]]
@@ -0,0 +1,17 @@
+import pytest
+
+from ctower import progress
+
+
+def test_queued_operations_wait_for_a_free_slot():
+    assert progress.estimate_remaining_seconds([], [120.0] * 320, concurrency=32) == pytest.approx(1200.0)
+
+
+def test_running_operations_delay_the_queue():
+    # two slots: 10s and 50s left, the queued 30s operations start at 10s and 40s
+    assert progress.estimate_remaining_seconds([10.0, 50.0], [30.0, 30.0], concurrency=2) == pytest.approx(70.0)
+
+
+def test_no_operations():
+    assert progress.estimate_remaining_seconds([], [], concurrency=10) == 0.0
+    assert progress.estimate_remaining_seconds([5.0], [], concurrency=0) == 5.0
@@ -0,0 +1,99 @@
+import json
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from ctower import aio
+from ctower import recording
+from ctower.models import ControlOperation
+
+
+class _Model:
+    def __init__(self, service_name, name):
+        self.name = name
+        self.service_model = type("ServiceModel", (), {"service_name": service_name})()
+
+
+def test_encode_decode_round_trip():
+    value = {
+        "time": datetime(2023, 1, 1, 12, 30, tzinfo=timezone.utc),
+        "body": b"\x00\xff",
+        "items": [{"nested": datetime(2023, 1, 2)}, ("a", 1)],
+    }
+    decoded = recording._decode(json.loads(json.dumps(recording._encode(value))))
+    assert decoded == {**value, "items": [{"nested": datetime(2023, 1, 2)}, ["a", 1]]}
+
+
+def test_call_key_ignores_param_order():
+    assert recording._call_key("controltower", "ListEnabledControls", {"a": 1, "b": 2}, "eu-west-1") == recording._call_key(
+        "controltower", "ListEnabledControls", {"b": 2, "a": 1}, "eu-west-1"
+    )
+    assert recording._call_key("s", "Op", {}, "eu-west-1") != recording._call_key("s", "Op", {}, "us-east-1")
+
+
+def _write_recording(directory, entries):
+    with open(directory / recording.RECORDING_FILE_NAME, "w") as file:
+        for entry in entries:
+            file.write(json.dumps(entry) + "\n")
+
+
+def _entry(response, region=None, params=None):
+    return {
+        "service": "controltower",
+        "operation": "GetControlOperation",
+        "region": region,
+        "params": params or {"operationIdentifier": "op-1"},
+        "status_code": 200,
+        "response": response,
+        "elapsed": 0.0,
+    }
+
+
+def _replay(replayer, region="eu-west-1", params=None):
+    context = {"ctower_params": params or {"operationIdentifier": "op-1"}, "client_region": region}
+    http_response, parsed = replayer._replay_call(_Model("controltower", "GetControlOperation"), {}, context)
+    return http_response.status_code, parsed
+
+
+def test_replays_repeated_calls_in_order_and_last_one_sticks(tmp_path):
+    _write_recording(
+        tmp_path,
+        [
+            _entry({"controlOperation": {"status": "IN_PROGRESS"}}, region="eu-west-1"),
+            _entry({"controlOperation": {"status": "SUCCEEDED"}}, region="eu-west-1"),
+        ],
+    )
+    replayer = recording.Replayer(str(tmp_path))
+    statuses = [_replay(replayer)[1]["controlOperation"]["status"] for _ in range(3)]
+    assert statuses == ["IN_PROGRESS", "SUCCEEDED", "SUCCEEDED"]
+    assert _replay(replayer)[1]["ResponseMetadata"]["HTTPStatusCode"] == 200
+
+
+def test_recordings_without_region_match_any_region(tmp_path):
+    _write_recording(tmp_path, [_entry({"controlOperation": {"status": "SUCCEEDED"}})])
+    replayer = recording.Replayer(str(tmp_path))
+    assert _replay(replayer, region="us-east-1")[0] == 200
+
+
+def test_missing_recording_raises(tmp_path):
+    _write_recording(tmp_path, [_entry({})])
+    replayer = recording.Replayer(str(tmp_path))
+    with pytest.raises(LookupError):
+        _replay(replayer, params={"operationIdentifier": "op-2"})
+
+
+def test_replayed_polls_skip_the_poll_interval(monkeypatch):
+    statuses = iter(["IN_PROGRESS", "IN_PROGRESS", "SUCCEEDED"])
+
+    async def get_control_operation(operation_identifier, client=None):
+        return ControlOperation.from_dict({"operationType": "ENABLE_CONTROL", "status": next(statuses)}, operation_identifier)
+
+    monkeypatch.setattr(aio, "get_control_operation", get_control_operation)
+    monkeypatch.setattr(aio.history, "record_finished", lambda operation: None)
+    monkeypatch.setattr(aio, "_poll_sleep_enabled", [True])
+    aio.disable_poll_sleep()
+    started = time.monotonic()
+    operation = aio.run(aio.wait_for_control_operation("op-1", poll_interval=5))
+    assert operation.status == "SUCCEEDED"
+    assert time.monotonic() - started < 1
@@ -0,0 +1,77 @@
+import pytest
+import typer
+
+from ctower import aio
+from ctower import rollout
+from ctower.models import ControlOperation, OrganizationalUnit
+
+SANDBOX = OrganizationalUnit(id="ou-1", arn="arn:ou-1", name="Sandbox", parent_id="r-1")
+PROD = OrganizationalUnit(id="ou-2", arn="arn:ou-2", name="Prod", parent_id="r-1")
+
+
+def test_read_waves_from_file(tmp_path):
+    waves_file = tmp_path / "waves.txt"
+    waves_file.write_text("# canary\nSandbox\n\nProd, ou-3 # the rest\n")
+    assert rollout.read_waves_from_file(str(waves_file)) == [["Sandbox"], ["Prod", "ou-3"]]
+
+
+def test_wave_targets_skip_already_enabled_controls():
+    enabled_control_ids_by_ou = {PROD.arn: frozenset(["AWS-GR_A"])}
+    targets = rollout.wave_targets([SANDBOX, PROD], ["AWS-GR_A", "AWS-GR_B"], enabled_control_ids_by_ou)
+    assert targets == [(SANDBOX, "AWS-GR_A"), (SANDBOX, "AWS-GR_B"), (PROD, "AWS-GR_B")]
+    assert rollout.wave_progress_targets(targets)[-1] == ((PROD.arn, "AWS-GR_B"), "AWS-GR_B", "ENABLE_CONTROL")
+
+
+def test_is_failed_result():
+    def operation(status):
+        return ControlOperation.from_dict({"status": status}, operation_id="op-1")
+
+    assert not rollout.is_failed_result(operation("SUCCEEDED"))
+    assert rollout.is_failed_result(operation("FAILED"))
+    assert rollout.is_failed_result(TimeoutError())
+
+
+def _stub_operations(monkeypatch, statuses_by_target):
+    """Stubs enabling and polling, a status of None times out. Returns the submitted OU ARNs in order."""
+    submitted = []
+
+    async def enable_control(control_arn, target_arn, client=None):
+        submitted.append(target_arn)
+        return target_arn
+
+    async def wait_for_control_operation(operation_id, client=None, poll_interval=None, timeout=None):
+        status = statuses_by_target[operation_id]
+        if status is None:
+            raise aio.ControlOperationTimeout(f"Control operation {operation_id} is still IN_PROGRESS")
+        return ControlOperation.from_dict({"status": status}, operation_id=operation_id)
+
+    monkeypatch.setattr(aio, "enable_control", enable_control)
+    monkeypatch.setattr(aio, "wait_for_control_operation", wait_for_control_operation)
+    return submitted
+
+
+def test_rollout_halts_before_the_next_wave_above_the_failure_threshold(monkeypatch):
+    submitted = _stub_operations(monkeypatch, {SANDBOX.arn: "FAILED", PROD.arn: "SUCCEEDED"})
+    with pytest.raises(typer.Exit):
+        rollout.run_rollout([[SANDBOX], [PROD]], ["AWS-GR_RESTRICTED_SSH"], failure_threshold=0.0, poll_interval=0)
+    assert submitted == [SANDBOX.arn]
+
+
+def test_rollout_continues_within_the_failure_threshold(monkeypatch):
+    submitted = _stub_operations(monkeypatch, {SANDBOX.arn: "FAILED", PROD.arn: "SUCCEEDED"})
+    results = rollout.run_rollout([[SANDBOX], [PROD]], ["AWS-GR_RESTRICTED_SSH"], failure_threshold=1.0, poll_interval=0)
+    assert submitted == [SANDBOX.arn, PROD.arn]
+    assert [result.status for _, _, result in results] == ["FAILED", "SUCCEEDED"]
+
+
+def test_nothing_is_submitted_after_an_operation_times_out(monkeypatch):
+    monkeypatch.setattr(aio, "MAX_MUTATION_CONCURRENCY", 1)
+    submitted = _stub_operations(monkeypatch, {SANDBOX.arn: None, PROD.arn: "SUCCEEDED"})
+    results = aio.run(rollout.run_wave([(SANDBOX, "AWS-GR_RESTRICTED_SSH"), (PROD, "AWS-GR_RESTRICTED_SSH")], poll_interval=0))
+    assert submitted == [SANDBOX.arn]
+    assert isinstance(results[0][2], aio.ControlOperationTimeout)
+    assert isinstance(results[1][2], rollout.OperationNotSubmitted)
+
+    with pytest.raises(typer.Exit):
+        rollout.run_rollout([[SANDBOX], [PROD]], ["AWS-GR_RESTRICTED_SSH"], failure_threshold=1.0, poll_interval=0)
+    assert submitted == [SANDBOX.arn, SANDBOX.arn]
@@ -0,0 +1,151 @@
+import gzip
+import json
+
+from ctower import state
+from ctower.models import EnabledControl, OrganizationalUnit
+
+OU_ARN = "arn:aws:organizations::111111111111:ou/o-1/ou-1"
+CONTROL_ARN = "arn:aws:controltower:eu-west-1::control/AWS-GR_RESTRICTED_SSH"
+
+
+def _state():
+    test_state = state._empty_state()
+    test_state["organizational_units"]["ou-1"] = {"Id": "ou-1", "Arn": OU_ARN, "Name": "Sandbox", "ParentId": "r-1"}
+    test_state["enabled_controls"][OU_ARN] = []
+    return test_state
+
+
+def _control_record(event_name, operation_id=None, **extra):
+    record = {
+        "eventSource": "controltower.amazonaws.com",
+        "eventName": event_name,
+        "awsRegion": "eu-west-1",
+        "eventTime": "2023-01-01T00:00:00Z",
+        "requestParameters": {"controlIdentifier": CONTROL_ARN, "targetIdentifier": OU_ARN},
+        "responseElements": {"operationIdentifier": operation_id} if operation_id else None,
+    }
+    record.update(extra)
+    return record
+
+
+def test_control_event_without_operation_id_is_applied():
+    test_state = _state()
+    assert state.apply_cloudtrail_record(test_state, _control_record("EnableControl"))
+    assert test_state["enabled_controls"][OU_ARN] == [CONTROL_ARN]
+    assert not state.apply_cloudtrail_record(test_state, _control_record("EnableControl"))
+    assert state.apply_cloudtrail_record(test_state, _control_record("DisableControl"))
+    assert test_state["enabled_controls"][OU_ARN] == []
+
+
+def test_control_event_is_pending_until_confirmed():
+    test_state = _state()
+    assert state.apply_cloudtrail_record(test_state, _control_record("EnableControl", "op-1"))
+    assert test_state["enabled_controls"][OU_ARN] == []
+    assert "op-1" in test_state["pending_operations"]
+
+    assert state.apply_operation_statuses(test_state, {"op-1": "IN_PROGRESS"}) == 0
+    assert "op-1" in test_state["pending_operations"]
+
+    assert state.apply_operation_statuses(test_state, {"op-1": "SUCCEEDED"}) == 1
+    assert test_state["enabled_controls"][OU_ARN] == [CONTROL_ARN]
+    assert test_state["pending_operations"] == {}
+
+
+def test_failed_operation_is_dropped():
+    test_state = _state()
+    state.apply_cloudtrail_record(test_state, _control_record("EnableControl", "op-1"))
+    assert state.apply_operation_statuses(test_state, {"op-1": "FAILED"}) == 0
+    assert test_state["enabled_controls"][OU_ARN] == []
+    assert test_state["pending_operations"] == {}
+
+
+def test_ignored_records():
+    test_state = _state()
+    assert not state.apply_cloudtrail_record(test_state, _control_record("EnableControl", errorCode="AccessDenied"))
+    assert not state.apply_cloudtrail_record(test_state, _control_record("EnableControl", awsRegion="us-east-1"))
+    assert not state.apply_cloudtrail_record(test_state, _control_record("GetControlOperation"))
+    assert test_state["enabled_controls"][OU_ARN] == []
+
+
+def test_organizational_unit_events():
+    test_state = _state()
+    created = {
+        "eventSource": "organizations.amazonaws.com",
+        "eventName": "CreateOrganizationalUnit",
+        "requestParameters": {"parentId": "r-1", "name": "Prod"},
+        "responseElements": {"organizationalUnit": {"id": "ou-2", "arn": "arn:ou-2", "name": "Prod"}},
+    }
+    assert state.apply_cloudtrail_record(test_state, created)
+    assert test_state["organizational_units"]["ou-2"]["ParentId"] == "r-1"
+    assert test_state["enabled_controls"]["arn:ou-2"] == []
+
+    renamed = {
+        "eventSource": "organizations.amazonaws.com",
+        "eventName": "UpdateOrganizationalUnit",
+        "requestParameters": {"organizationalUnitId": "ou-2", "name": "Production"},
+    }
+    assert state.apply_cloudtrail_record(test_state, renamed)
+    assert test_state["organizational_units"]["ou-2"]["Name"] == "Production"
+
+    deleted = {
+        "eventSource": "organizations.amazonaws.com",
+        "eventName": "DeleteOrganizationalUnit",
+        "requestParameters": {"organizationalUnitId": "ou-2"},
+    }
+    assert state.apply_cloudtrail_record(test_state, deleted)
+    assert "ou-2" not in test_state["organizational_units"]
+    assert "arn:ou-2" not in test_state["enabled_controls"]
+
+
+def test_log_files_are_ordered_by_timestamp_not_account(tmp_path):
+    names = [
+        "111111111111_CloudTrail_us-east-1_20230102T0000Z_a.json.gz",
+        "222222222222_CloudTrail_eu-west-1_20230101T0000Z_b.json.gz",
+        "111111111111_CloudTrail_eu-west-1_20230103T0000Z_c.json",
+        "notes.txt",
+    ]
+    for name in names:
+        (tmp_path / name).write_text("{}")
+    ordered = [rel_path for rel_path, _ in state.iter_cloudtrail_log_files(str(tmp_path), processed_files=[names[2]])]
+    assert ordered == [names[1], names[0]]
+
+
+def test_ingest_applies_records_in_event_order(tmp_path):
+    records = [
+        _control_record("DisableControl", eventTime="2023-01-01T00:02:00Z"),
+        _control_record("EnableControl", eventTime="2023-01-01T00:01:00Z"),
+    ]
+    with gzip.open(tmp_path / "111111111111_CloudTrail_eu-west-1_20230101T0000Z_a.json.gz", "wt") as file:
+        json.dump({"Records": records}, file)
+    test_state = _state()
+    assert state.ingest_cloudtrail_logs(test_state, str(tmp_path)) == (1, 2)
+    assert test_state["enabled_controls"][OU_ARN] == []
+    assert test_state["last_event_time"] == "2023-01-01T00:02:00Z"
+    assert state.ingest_cloudtrail_logs(test_state, str(tmp_path)) == (0, 0)
+
+
+def test_baseline_keeps_unregistered_and_skips_failed_organizational_units(monkeypatch):
+    registered, unregistered, failing = (
+        OrganizationalUnit(id=f"ou-{number}", arn=f"arn:ou-{number}", name=f"OU {number}", parent_id="r-1")
+        for number in (1, 2, 3)
+    )
+    not_found = state.ct_client.exceptions.ResourceNotFoundException(
+        {"Error": {"Code": "ResourceNotFoundException", "Message": "not registered"}}, "ListEnabledControls"
+    )
+    results = {
+        registered.arn: [EnabledControl.from_arn(CONTROL_ARN)],
+        unregistered.arn: not_found,
+        failing.arn: RuntimeError("throttled"),
+    }
+
+    async def list_enabled_controls_for_organizational_units(organizational_units):
+        return {ou.arn: results[ou.arn] for ou in organizational_units}
+
+    monkeypatch.setattr(state, "get_organizational_units", lambda: [registered, unregistered, failing])
+    monkeypatch.setattr(
+        state.aio, "list_enabled_controls_for_organizational_units", list_enabled_controls_for_organizational_units
+    )
+    baseline, failed = state.build_baseline_state()
+    assert set(baseline["organizational_units"]) == {"ou-1", "ou-2", "ou-3"}
+    assert baseline["enabled_controls"] == {registered.arn: [CONTROL_ARN], unregistered.arn: []}
+    assert list(failed) == [failing]